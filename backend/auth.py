@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Tuple
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
@@ -26,15 +28,25 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-def verify_token(token: str) -> Optional[str]:
+@lru_cache(maxsize=4096)
+def _decode_token(token: str) -> Tuple[Optional[str], Optional[float]]:
+    """Verify the token signature once and cache (email, exp); every API request re-sends the same token.
+    Invalid tokens cache as (None, None).
+    """
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-        return email
     except JWTError:
+        return None, None
+    return payload.get("sub"), payload.get("exp")
+
+def verify_token(token: str) -> Optional[str]:
+    email, exp = _decode_token(token)
+    if email is None:
+        return None
+    # jwt.decode checked exp when the token was first seen; a cached entry can outlive it
+    if exp is not None and exp <= time.time():
         return None
+    return email
 
 def get_current_user_email(token: str) -> str:
     credentials_exception = HTTPException(
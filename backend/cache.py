@@ -0,0 +1,59 @@
+"""
+In-process TTL cache shared by the user, connection_data, agent, health score and report caches
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+
+class TTLCache:
+    """Thread-safe dict whose entries expire after ttl_seconds and which holds at most max_entries.
+    When full, expired entries are dropped first, then the oldest ones.
+    Cached values are shared between callers - treat them as read-only.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """The live value for key, or default"""
+        with self._lock:
+            cached = self._entries.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        return default
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """{key: value} for the keys that have a live entry (one lock acquisition)"""
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                cached = self._entries.get(key)
+                if cached and cached[0] > now:
+                    found[key] = cached[1]
+        return found
+
+    def set(self, key: Hashable, value: Any) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                for k in [k for k, v in self._entries.items() if v[0] <= now]:
+                    del self._entries[k]
+                while len(self._entries) >= self.max_entries:
+                    del self._entries[next(iter(self._entries))]
+            self._entries[key] = (now + self.ttl_seconds, value)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> None:
+        """Drop every entry for which predicate(key, value) is true"""
+        with self._lock:
+            for k in [k for k, v in self._entries.items() if predicate(k, v[1])]:
+                del self._entries[k]
@@ -65,6 +65,12 @@ class Settings(BaseSettings):
     
     # Gemini AI Settings
     gemini_api_key: str = ""
+    
+    # Income Allocation Settings
+    # Synced income below this amount (refunds, cashback) skips the AI allocation pipeline
+    min_allocation_income: float = 100.0
+    # Re-read connection_allocated_txn (_verify_allocated_ids) after marking income as allocated and log what persisted (debug only - extra round-trip)
+    debug_verify_allocation: bool = False
 
     class Config:
         # Point to the .env file
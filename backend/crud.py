@@ -1,14 +1,18 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, text
+from sqlalchemy.orm import Session, defer
+from sqlalchemy import case, delete, func, text, update
+from sqlalchemy.orm.attributes import set_committed_value
 from models import User, PaymentConnection, Goal, ManualTransaction, Investment
 from schemas import UserCreate, ConnectionCreate, ConnectionUpdate, GoalCreate, GoalUpdate, ManualTransactionCreate, InvestmentCreate, InvestmentUpdate
 from auth import get_password_hash, verify_password
+from cache import TTLCache
 from fastapi import HTTPException, status
 from typing import List, Optional, Tuple
 from uuid import UUID
 import uuid
 import json
+import orjson
 import logging
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 
 # IST timezone constant (UTC+5:30)
@@ -36,6 +40,36 @@ def get_user_by_email(db: Session, email: str):
 def get_user_by_id(db: Session, user_id: str):
     return db.query(User).filter(User.id == user_id).first()
 
+@dataclass(frozen=True, slots=True)
+class CachedUser:
+    """The parts of a user row that request authentication needs"""
+    id: UUID
+    email: str
+
+# email -> CachedUser for authenticated requests, so they skip the users SELECT.
+# Entries are dropped by update_user/delete_user; the TTL bounds staleness for anything else.
+USER_CACHE_TTL_SECONDS = 300
+USER_CACHE_MAX_ENTRIES = 10_000
+_user_cache = TTLCache(USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_ENTRIES)
+
+def get_cached_user_by_email(db: Session, email: str) -> Optional[CachedUser]:
+    """Like get_user_by_email, but returns a CachedUser served from an in-process TTL cache"""
+    cached = _user_cache.get(email)
+    if cached is not None:
+        return cached
+    
+    row = db.query(User.id, User.email).filter(User.email == email).first()
+    if not row:
+        return None
+    user = CachedUser(id=row.id, email=row.email)
+    _user_cache.set(email, user)
+    return user
+
+def invalidate_cached_user(user_id: UUID):
+    """Forget any cached entry for this user (after an update or delete)"""
+    user_id = str(user_id)
+    _user_cache.invalidate_where(lambda email, user: str(user.id) == user_id)
+
 def create_user(db: Session, user: UserCreate):
     # Check if user already exists
     existing_user = get_user_by_email(db, user.email)
@@ -98,6 +132,7 @@ def update_user(db: Session, user_id: UUID, user_update):
     
     db.commit()
     db.refresh(user)
+    invalidate_cached_user(user_id)
     return user
 
 def delete_user(db: Session, user_id: UUID):
@@ -122,6 +157,7 @@ def delete_user(db: Session, user_id: UUID):
     # Delete user
     db.delete(user)
     db.commit()
+    invalidate_cached_user(user_id)
     return True
 
 def get_user_by_reset_token(db: Session, token: str):
@@ -156,39 +192,13 @@ def create_connection(db: Session, user_id: UUID, connection: ConnectionCreate):
                 detail=f"Connection '{connection.name}' is already connected"
             )
         else:
-            # Connection exists but is disconnected - reuse it and preserve allocated_transaction_ids
-            logger.info(f"Reconnecting existing connection '{connection.name}' (ID: {existing.id}) - preserving allocated_transaction_ids")
-            
-            # Preserve allocated_transaction_ids from existing connection
-            preserved_allocated_ids = []
-            if existing.connection_data:
-                try:
-                    if isinstance(existing.connection_data, str):
-                        existing_data = json.loads(existing.connection_data)
-                    else:
-                        existing_data = existing.connection_data
-                    if isinstance(existing_data, dict):
-                        preserved_allocated_ids = existing_data.get("allocated_transaction_ids", [])
-                        logger.info(f"Preserving {len(preserved_allocated_ids)} allocated transaction IDs: {preserved_allocated_ids[:5]}...")
-                except Exception as e:
-                    logger.warning(f"Error parsing existing connection_data: {e}")
+            # Connection exists but is disconnected - reuse it (its connection_allocated_txn rows carry over)
+            logger.info(f"Reconnecting existing connection '{connection.name}' (ID: {existing.id})")
             
             # connection.connection_data already contains merged mock_data from router
-            # Just preserve allocated_transaction_ids
             connection_data_json = None
             if connection.connection_data:
-                merged_data = connection.connection_data.copy()
-            else:
-                merged_data = {}
-            
-            # CRITICAL: Restore preserved allocated_transaction_ids
-            if preserved_allocated_ids:
-                merged_data["allocated_transaction_ids"] = preserved_allocated_ids
-                logger.info(f"✅ Restored {len(preserved_allocated_ids)} allocated transaction IDs to reconnected connection")
-            elif "allocated_transaction_ids" not in merged_data:
-                merged_data["allocated_transaction_ids"] = []
-            
-            connection_data_json = json.dumps(merged_data)
+                connection_data_json = json.dumps(connection.connection_data)
             
             # Update existing connection instead of creating new one
             existing.status = "connected"
@@ -209,7 +219,6 @@ def create_connection(db: Session, user_id: UUID, connection: ConnectionCreate):
                 except (json.JSONDecodeError, TypeError) as e:
                     logger.warning(f"Error parsing connection_data for reconnected connection {existing.name}: {e}")
                     existing.connection_data = {
-                        "allocated_transaction_ids": preserved_allocated_ids,
                         "transactions": [],
                         "entries": [],
                         "monthly_summary": {},
@@ -246,7 +255,6 @@ def create_connection(db: Session, user_id: UUID, connection: ConnectionCreate):
         except (json.JSONDecodeError, TypeError) as e:
             logger.warning(f"Error parsing connection_data for new connection {db_connection.name}: {e}")
             db_connection.connection_data = {
-                "allocated_transaction_ids": [],
                 "transactions": [],
                 "entries": [],
                 "monthly_summary": {},
@@ -275,7 +283,6 @@ def get_user_connections(db: Session, user_id: UUID, status_filter: Optional[str
                 if conn.connection_data is None:
                     logger.warning(f"Connection '{conn.name}' (id: {conn.id}) has NULL connection_data in database - initializing empty structure")
                     conn.connection_data = {
-                        "allocated_transaction_ids": [],
                         "transactions": [],
                         "entries": [],
                         "monthly_summary": {},
@@ -288,8 +295,8 @@ def get_user_connections(db: Session, user_id: UUID, status_filter: Optional[str
                 if conn.connection_data:
                     try:
                         if isinstance(conn.connection_data, str):
-                            # Use faster json.loads with object_hook for large JSON
-                            conn.connection_data = json.loads(conn.connection_data)
+                            # orjson parses large connection_data blobs several times faster than json
+                            conn.connection_data = orjson.loads(conn.connection_data)
                         elif isinstance(conn.connection_data, dict):
                             # Already a dict, keep as is
                             pass
@@ -297,7 +304,6 @@ def get_user_connections(db: Session, user_id: UUID, status_filter: Optional[str
                             # Unexpected type, initialize empty structure
                             logger.warning(f"Connection {conn.id} has unexpected connection_data type: {type(conn.connection_data)}")
                             conn.connection_data = {
-                                "allocated_transaction_ids": [],
                                 "transactions": [],
                                 "entries": [],
                                 "monthly_summary": {},
@@ -310,7 +316,6 @@ def get_user_connections(db: Session, user_id: UUID, status_filter: Optional[str
                         logger.error(f"Error parsing connection_data for connection {conn.id} ({conn.name}): {e}")
                         logger.error(f"Raw connection_data value: {str(conn.connection_data)[:200] if conn.connection_data else 'None'}...")
                         conn.connection_data = {
-                            "allocated_transaction_ids": [],
                             "transactions": [],
                             "entries": [],
                             "monthly_summary": {},
@@ -326,9 +331,28 @@ def get_user_connections(db: Session, user_id: UUID, status_filter: Optional[str
         # Return empty list on error instead of raising
         return []
 
+# Parsed connection_data per connection, keyed by (id, last_sync, updated_at): every write to the
+# blob either bumps updated_at (ORM update) or last_sync (sync), so a changed row never hits a stale entry.
+# In-process like the agent cache in services/ai_coach.py; the TTL only bounds memory for idle connections.
+CONNECTION_DATA_CACHE_TTL_SECONDS = 300
+CONNECTION_DATA_CACHE_MAX_ENTRIES = 256
+_connection_data_cache = TTLCache(CONNECTION_DATA_CACHE_TTL_SECONDS, CONNECTION_DATA_CACHE_MAX_ENTRIES)
+
+def _connection_data_cache_key(connection) -> tuple:
+    return (str(connection.id), connection.last_sync, connection.updated_at)
+
+def _remember_connection_data(connection, data: dict):
+    """Cache the parsed connection_data for the connection's current (last_sync, updated_at).
+    The dict is cached as-is, not copied, so whoever holds it must treat it as read-only.
+    """
+    _connection_data_cache.set(_connection_data_cache_key(connection), data)
+
 def get_connection_by_id(db: Session, connection_id: UUID, user_id: UUID):
-    """Get a specific connection by ID (ensuring it belongs to the user)"""
-    connection = db.query(PaymentConnection).filter(
+    """Get a specific connection by ID (ensuring it belongs to the user).
+    connection_data is returned parsed and may be shared with the cache - treat it as read-only.
+    """
+    # Load connection_data lazily: on a cache hit the JSON blob is neither fetched nor parsed
+    connection = db.query(PaymentConnection).options(defer(PaymentConnection.connection_data)).filter(
         PaymentConnection.id == connection_id,
         PaymentConnection.user_id == user_id
     ).first()
@@ -336,17 +360,69 @@ def get_connection_by_id(db: Session, connection_id: UUID, user_id: UUID):
     if not connection:
         return None
     
+    cached = _connection_data_cache.get(_connection_data_cache_key(connection))
+    if cached is not None:
+        set_committed_value(connection, "connection_data", cached)
+        return connection
+    
     # Parse connection_data from JSON string to dict
+    # set_committed_value keeps the dict from being flushed back to the String column by a later commit
     if connection.connection_data:
         try:
-            connection.connection_data = json.loads(connection.connection_data)
+            data = orjson.loads(connection.connection_data)
         except (json.JSONDecodeError, TypeError):
-            connection.connection_data = None
+            data = None
+        set_committed_value(connection, "connection_data", data)
+        if type(data) is dict:
+            _remember_connection_data(connection, data)
     
     return connection
 
+def get_user_connection_data(db: Session, user_id: UUID, status_filter: Optional[str] = None,
+                             limit: Optional[int] = None) -> list:
+    """(connection, parsed connection_data) pairs for a user's connections, oldest first.
+    Blobs come from the connection_data cache where possible; the rest are fetched in one
+    query rather than one lazy load per connection. The dicts may be shared with the
+    cache - treat them as read-only.
+    """
+    query = db.query(PaymentConnection).options(defer(PaymentConnection.connection_data)).filter(
+        PaymentConnection.user_id == user_id
+    )
+    if status_filter:
+        query = query.filter(PaymentConnection.status == status_filter)
+    query = query.order_by(PaymentConnection.created_at)
+    if limit is not None:
+        query = query.limit(limit)
+    connections = query.all()
+    
+    cached = _connection_data_cache.get_many(_connection_data_cache_key(conn) for conn in connections)
+    data_by_id = {}
+    for conn in connections:
+        key = _connection_data_cache_key(conn)
+        if key in cached:
+            data_by_id[conn.id] = cached[key]
+    
+    missing = [conn for conn in connections if conn.id not in data_by_id]
+    if missing:
+        raw_by_id = dict(
+            db.query(PaymentConnection.id, PaymentConnection.connection_data)
+            .filter(PaymentConnection.id.in_([conn.id for conn in missing]))
+            .all()
+        )
+        for conn in missing:
+            raw = raw_by_id.get(conn.id)
+            try:
+                data = orjson.loads(raw) if raw else None
+            except (json.JSONDecodeError, TypeError):
+                data = None
+            if type(data) is dict:
+                _remember_connection_data(conn, data)
+            data_by_id[conn.id] = data
+    
+    return [(conn, data_by_id[conn.id]) for conn in connections]
+
 def disconnect_connection(db: Session, connection_id: UUID, user_id: UUID):
-    """Disconnect a payment connection - marks as disconnected instead of deleting to preserve allocated_transaction_ids"""
+    """Disconnect a payment connection - marks as disconnected instead of deleting so it can be reconnected"""
     # Get connection directly from database without parsing to avoid JSON encoding issues
     connection = db.query(PaymentConnection).filter(
         PaymentConnection.id == connection_id,
@@ -371,19 +447,20 @@ def disconnect_connection(db: Session, connection_id: UUID, user_id: UUID):
         except (json.JSONDecodeError, TypeError):
             connection_data = None
     
-    # Mark as disconnected instead of deleting - this preserves allocated_transaction_ids
-    # so reconnecting won't cause duplicate allocations
+    # Mark as disconnected instead of deleting - reconnecting reuses the row
     # CRITICAL: connection_data is already a JSON string from the database, so we don't need to re-encode it
     connection.status = "disconnected"
     db.commit()
     db.refresh(connection)
     
-    logger.info(f"Connection '{connection.name}' marked as disconnected (preserving allocated_transaction_ids for future reconnect)")
+    logger.info(f"Connection '{connection.name}' marked as disconnected")
     
     return connection_data
 
 def update_connection(db: Session, connection_id: UUID, user_id: UUID, connection_update: ConnectionUpdate):
-    """Update a payment connection"""
+    """Update a payment connection.
+    connection_data is returned parsed and shared with the cache - treat it as read-only.
+    """
     # CRITICAL: Get connection directly from database to avoid parsing issues
     connection = db.query(PaymentConnection).filter(
         PaymentConnection.id == connection_id,
@@ -399,29 +476,20 @@ def update_connection(db: Session, connection_id: UUID, user_id: UUID, connectio
     if connection_update.status is not None:
         connection.status = connection_update.status
     
+    merged_data = None
     if connection_update.connection_data is not None:
         # CRITICAL: Get fresh data directly from database to avoid stale reads
-        # Expire and refresh to ensure we have the latest connection_data from DB
-        db.expire(connection)
+        # A single refresh re-reads the committed row (background tasks write from other sessions)
         db.refresh(connection)
-        
-        # Also query directly from database as a double-check
-        from sqlalchemy import text
-        result = db.execute(
-            text("SELECT connection_data FROM payment_connections WHERE id = :id AND user_id = :user_id"),
-            {"id": connection_id, "user_id": user_id}
-        ).first()
-        
-        # Use the direct query result if available, otherwise use the refreshed connection object
-        raw_connection_data = result[0] if result and result[0] else connection.connection_data
+        raw_connection_data = connection.connection_data
         
         # CRITICAL: Merge with existing connection_data instead of replacing
-        # This prevents losing transactions when only updating allocated_transaction_ids
+        # This prevents losing transactions when only updating some fields
         existing_data = {}
         if raw_connection_data:
             try:
                 if isinstance(raw_connection_data, str):
-                    existing_data = json.loads(raw_connection_data)
+                    existing_data = orjson.loads(raw_connection_data)
                 elif isinstance(raw_connection_data, dict):
                     existing_data = raw_connection_data
             except (json.JSONDecodeError, TypeError) as e:
@@ -447,7 +515,7 @@ def update_connection(db: Session, connection_id: UUID, user_id: UUID, connectio
             merged_data["monthly_summary"] = existing_data["monthly_summary"]
         
         # Save merged data
-        connection.connection_data = json.dumps(merged_data)
+        connection.connection_data = orjson.dumps(merged_data).decode()
         logger.info(f"✅ update_connection: Merged connection_data for '{connection.name}' (preserved {len(merged_data.get('transactions', []))} transactions, {len(merged_data.get('entries', []))} entries)")
     
     if connection_update.last_sync is not None:
@@ -460,13 +528,17 @@ def update_connection(db: Session, connection_id: UUID, user_id: UUID, connectio
     db.refresh(connection)
     
     # Parse connection_data back to dict
-    if connection.connection_data:
+    # The refreshed row is the saved state, so callers can use the returned dict without another SELECT/parse.
+    # set_committed_value keeps the dict from being flushed back to the String column by a later commit
+    if merged_data is not None:
+        set_committed_value(connection, "connection_data", merged_data)
+        _remember_connection_data(connection, merged_data)
+    elif connection.connection_data:
         try:
-            connection.connection_data = json.loads(connection.connection_data)
+            set_committed_value(connection, "connection_data", orjson.loads(connection.connection_data))
         except (json.JSONDecodeError, TypeError) as e:
             logger.error(f"Failed to parse connection_data after update: {e}")
             connection.connection_data = {
-                "allocated_transaction_ids": [],
                 "transactions": [],
                 "entries": [],
                 "monthly_summary": {},
@@ -478,7 +550,9 @@ def update_connection(db: Session, connection_id: UUID, user_id: UUID, connectio
     return connection
 
 def sync_connection(db: Session, connection_id: UUID, user_id: UUID):
-    """Sync a connection (reload mock data from JSON file and update last_sync timestamp)"""
+    """Sync a connection (reload mock data from JSON file and update last_sync timestamp).
+    connection_data is returned parsed and shared with the cache - treat it as read-only.
+    """
     connection = get_connection_by_id(db, connection_id, user_id)
     
     if not connection:
@@ -494,8 +568,8 @@ def sync_connection(db: Session, connection_id: UUID, user_id: UUID):
     logger = logging.getLogger(__name__)
     
     # CRITICAL: Query database directly to get latest connection_data as JSON string
-    # This ensures we have the most recent allocated_transaction_ids that might have been saved
-    # by background allocation tasks (which run in separate database sessions)
+    # This ensures we have the most recent connection_data that might have been saved
+    # by other sessions
     # IMPORTANT: First, expire and refresh to get latest data from database
     # Also flush any pending changes to ensure we're reading committed data
     db.expire(connection)
@@ -548,7 +622,7 @@ def sync_connection(db: Session, connection_id: UUID, user_id: UUID):
             logger.warning(f"⚠️  Sync: SQL query failed: {e}")
     
     if not raw_connection_data_str:
-        logger.warning(f"⚠️  Sync: connection_data is None/empty for '{connection.name}' - will initialize empty allocated_transaction_ids list")
+        logger.warning(f"⚠️  Sync: connection_data is None/empty for '{connection.name}'")
     
     # Map connection name to filename (same logic as in connections.py)
     filename_map = {
@@ -573,6 +647,9 @@ def sync_connection(db: Session, connection_id: UUID, user_id: UUID):
     logger.info(f"🔄 Sync: Mock data directory: {mock_data_dir}")
     logger.info(f"🔄 Sync: Current file location: {Path(__file__).parent}")
     
+    # The dict written to connection_data below, reused after the commit instead of re-reading the blob
+    saved_data = None
+    
     # If JSON file exists, reload it and update connection_data
     if file_path.exists():
         import logging
@@ -585,8 +662,6 @@ def sync_connection(db: Session, connection_id: UUID, user_id: UUID):
             
             # Merge with existing connection_data to preserve any custom fields
             existing_data = {}
-            # CRITICAL: Preserve allocated_transaction_ids FIRST before anything else
-            preserved_allocated_ids = []
             
             # IMPORTANT: Use raw_connection_data_str (from direct database query) instead of connection.connection_data
             # This ensures we get the latest data that might have been saved by background tasks
@@ -602,13 +677,6 @@ def sync_connection(db: Session, connection_id: UUID, user_id: UUID):
                         existing_data = connection_data_to_parse
                     else:
                         existing_data = {}
-                    
-                    # Extract allocated_transaction_ids before we overwrite anything
-                    preserved_allocated_ids = existing_data.get("allocated_transaction_ids", [])
-                    if preserved_allocated_ids:
-                        logger.info(f"🔄 Sync: ✅ Preserving {len(preserved_allocated_ids)} allocated transaction IDs from existing connection_data: {preserved_allocated_ids[:5]}...")
-                    else:
-                        logger.warning(f"⚠️  Sync: No allocated_transaction_ids found in existing connection_data for '{connection.name}' (keys: {list(existing_data.keys()) if existing_data else 'empty'})")
                 except (json.JSONDecodeError, TypeError) as e:
                     logger.warning(f"⚠️  Sync: Failed to parse existing connection_data: {e}")
                     existing_data = {}
@@ -656,28 +724,8 @@ def sync_connection(db: Session, connection_id: UUID, user_id: UUID):
                 if key not in existing_data and key in fresh_mock_data:
                     existing_data[key] = fresh_mock_data[key]
             
-            # CRITICAL: Preserve allocated_transaction_ids to prevent double allocation
-            # This list tracks which transactions have already been allocated to goals
-            # Always restore preserved IDs, even if existing_data doesn't have them
-            # This is the MOST IMPORTANT field to preserve - without it, transactions get allocated multiple times!
-            if preserved_allocated_ids:
-                existing_data["allocated_transaction_ids"] = preserved_allocated_ids
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.info(f"🔄 Sync: ✅ Restored {len(preserved_allocated_ids)} allocated transaction IDs to connection_data: {preserved_allocated_ids[:5]}...")
-            elif "allocated_transaction_ids" in existing_data:
-                # Keep the existing allocated_transaction_ids list if preserved_allocated_ids is empty
-                # Don't overwrite it with fresh_mock_data (which doesn't have this field)
-                import logging
-                logger = logging.getLogger(__name__)
-                existing_count = len(existing_data.get("allocated_transaction_ids", []))
-                logger.info(f"🔄 Sync: Keeping existing {existing_count} allocated transaction IDs from existing_data")
-            else:
-                # No allocated_transaction_ids found - initialize empty list to prevent errors
-                existing_data["allocated_transaction_ids"] = []
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.warning(f"⚠️  Sync: No allocated_transaction_ids found, initializing empty list for '{connection.name}'")
+            # Allocated transaction IDs live in connection_allocated_txn; drop the legacy list if still present
+            existing_data.pop("allocated_transaction_ids", None)
             
             # CRITICAL: Ensure connection_data is ALWAYS saved, even if it was NULL before
             # Convert existing_data to JSON string and save it
@@ -688,6 +736,7 @@ def sync_connection(db: Session, connection_id: UUID, user_id: UUID):
             
             connection_data_json = json.dumps(existing_data)
             connection.connection_data = connection_data_json
+            saved_data = existing_data
             
             # CRITICAL: Explicitly commit to ensure data is persisted
             db.flush()  # Flush before commit to catch any errors
@@ -696,7 +745,6 @@ def sync_connection(db: Session, connection_id: UUID, user_id: UUID):
             logger.info(f"🔄 Sync: JSON length: {len(connection_data_json)} chars")
             logger.info(f"🔄 Sync: Transactions in saved data: {transaction_count_before_save}")
             logger.info(f"🔄 Sync: Entries in saved data: {entry_count_before_save}")
-            logger.info(f"🔄 Sync: Allocated IDs: {len(existing_data.get('allocated_transaction_ids', []))}")
         except Exception as e:
             # If reload fails, log error but continue with sync
             import logging
@@ -718,15 +766,15 @@ def sync_connection(db: Session, connection_id: UUID, user_id: UUID):
         # Only initialize if connection_data is completely None
         if connection.connection_data is None:
             logger.warning(f"⚠️  Connection '{connection.name}' has no file and no existing data - initializing empty structure")
-            connection.connection_data = json.dumps({
-                "allocated_transaction_ids": [],
+            saved_data = {
                 "transactions": [],
                 "entries": [],
                 "monthly_summary": {},
                 "account_id": None,
                 "status": "connected",
                 "balance": 0
-            })
+            }
+            connection.connection_data = json.dumps(saved_data)
         else:
             logger.warning(f"⚠️  File not found but connection has existing data - preserving it")
     
@@ -735,15 +783,15 @@ def sync_connection(db: Session, connection_id: UUID, user_id: UUID):
     # CRITICAL: Ensure connection_data is never NULL - initialize if needed
     if connection.connection_data is None:
         logger.warning(f"⚠️  Sync: connection_data is None before commit, initializing with empty structure")
-        connection.connection_data = json.dumps({
-            "allocated_transaction_ids": [],
+        saved_data = {
             "transactions": [],
             "entries": [],
             "monthly_summary": {},
             "account_id": None,
             "status": "connected",
             "balance": 0
-        })
+        }
+        connection.connection_data = json.dumps(saved_data)
     
     # Commit the changes
     try:
@@ -754,48 +802,30 @@ def sync_connection(db: Session, connection_id: UUID, user_id: UUID):
         db.rollback()
         raise
     
-    # CRITICAL: Refresh to verify the data was saved
-    db.refresh(connection)
-    
-    # Verify connection_data was saved - query directly from database to be sure
-    from sqlalchemy import text
-    result = db.execute(
-        text("SELECT connection_data FROM payment_connections WHERE id = :id"),
-        {"id": connection_id}
-    ).first()
+    # Reuse the dict that was just written instead of re-reading and re-parsing the blob.
+    # set_committed_value keeps the dict from being flushed back to the String column by a later commit;
+    # the other expired columns (last_sync, updated_at) still reload on access, without the blob.
+    if saved_data is not None:
+        set_committed_value(connection, "connection_data", saved_data)
+        # The new last_sync makes this a fresh cache key; later GETs reuse the parsed dict
+        _remember_connection_data(connection, saved_data)
+        return connection
     
-    if result and result[0]:
-        logger.info(f"🔄 Sync: ✅ Verified connection_data saved to database (length: {len(result[0])} chars)")
-        # Verify it has transactions
-        try:
-            saved_data = json.loads(result[0])
-            txn_count = len(saved_data.get("transactions", []))
-            logger.info(f"🔄 Sync: ✅ Verified {txn_count} transactions in saved connection_data")
-        except:
-            logger.warning(f"🔄 Sync: ⚠️ Could not parse saved connection_data to verify transactions")
-    else:
-        logger.error(f"❌ Sync: CRITICAL - connection_data is still NULL after commit for '{connection.name}'!")
-        logger.error(f"❌ Sync: This means the commit failed or was rolled back!")
+    # Nothing was written (mock data reload failed) - parse the stored blob
+    db.refresh(connection)
     
     # Parse connection_data back to dict
     if connection.connection_data:
         try:
             connection.connection_data = json.loads(connection.connection_data)
-            # Verify allocated_transaction_ids are preserved after sync
             if isinstance(connection.connection_data, dict):
-                allocated_count = len(connection.connection_data.get("allocated_transaction_ids", []))
-                import logging
-                logger = logging.getLogger(__name__)
-                if allocated_count > 0:
-                    logger.info(f"🔄 Sync: ✅ Verified {allocated_count} allocated transaction IDs preserved after sync for '{connection.name}'")
-                else:
-                    logger.warning(f"⚠️  Sync: No allocated_transaction_ids found after sync for '{connection.name}' - this may cause duplicate allocations!")
+                # The new last_sync makes this a fresh cache key; later GETs reuse the parsed dict
+                _remember_connection_data(connection, connection.connection_data)
         except (json.JSONDecodeError, TypeError) as e:
             logger.error(f"❌ Sync: Failed to parse connection_data JSON for '{connection.name}' after commit: {e}")
             logger.error(f"❌ Sync: Raw connection_data value: {str(connection.connection_data)[:200]}...")
             # Initialize with empty structure instead of None to prevent frontend errors
             connection.connection_data = {
-                "allocated_transaction_ids": [],
                 "transactions": [],
                 "entries": [],
                 "monthly_summary": {},
@@ -831,12 +861,52 @@ def create_goal(db: Session, user_id: UUID, goal: GoalCreate):
     db.refresh(db_goal)
     return db_goal
 
-def get_user_goals(db: Session, user_id: UUID, include_completed: bool = True):
-    """Get all goals for a user - optimized with indexes"""
+def get_user_goals(db: Session, user_id: UUID, include_completed: bool = True,
+                   skip: int = 0, limit: Optional[int] = None):
+    """Get a user's goals, newest first - optimized with indexes.
+    `limit=None` returns every goal (what the app currently expects).
+    """
     query = db.query(Goal).filter(Goal.user_id == user_id)
     if not include_completed:
         query = query.filter(Goal.is_completed == False)  # Uses index on is_completed
-    return query.order_by(Goal.created_at.desc()).all()
+    query = query.order_by(Goal.created_at.desc()).offset(skip)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+def get_goals_fingerprint(db: Session, user_id: UUID, include_completed: bool = True) -> tuple:
+    """(count, latest change) of a user's goals, for ETags. updated_at is only set
+    on update, so new rows count by created_at.
+    """
+    query = db.query(
+        func.count(Goal.id), func.max(func.coalesce(Goal.updated_at, Goal.created_at))
+    ).filter(Goal.user_id == user_id)
+    if not include_completed:
+        query = query.filter(Goal.is_completed == False)
+    return tuple(query.one())
+
+def get_goals_for_user(db: Session, user_id: UUID, include_completed: bool = True):
+    """Get a user's goals as plain dicts (same shape the GET_GOALS agent tool returns).
+    Selects only the columns the dicts need, so no ORM objects are hydrated.
+    """
+    query = db.query(
+        Goal.id, Goal.name, Goal.target, Goal.saved, Goal.type, Goal.is_completed, Goal.deadline
+    ).filter(Goal.user_id == user_id)
+    if not include_completed:
+        query = query.filter(Goal.is_completed == False)
+    return [
+        {
+            "id": str(goal_id),
+            "name": name,
+            "target": float(target),
+            "saved": float(saved or 0),
+            "remaining": float(target - (saved or 0)),
+            "type": goal_type,
+            "is_completed": is_completed,
+            "deadline": deadline.isoformat() if deadline else None
+        }
+        for goal_id, name, target, saved, goal_type, is_completed, deadline in query.order_by(Goal.created_at.desc())
+    ]
 
 def get_goal_by_id(db: Session, goal_id: UUID, user_id: UUID):
     """Get a specific goal by ID (ensuring it belongs to the user)"""
@@ -846,40 +916,31 @@ def get_goal_by_id(db: Session, goal_id: UUID, user_id: UUID):
     ).first()
 
 def update_goal(db: Session, goal_id: UUID, user_id: UUID, goal_update: GoalUpdate):
-    """Update a goal"""
-    goal = get_goal_by_id(db, goal_id, user_id)
+    """Update a goal (fields left as None are unchanged) with a single UPDATE ... RETURNING"""
+    values = {field: value for field, value in goal_update.model_dump().items() if value is not None}
+    if not values:
+        goal = get_goal_by_id(db, goal_id, user_id)
+    else:
+        goal = db.execute(
+            update(Goal).where(Goal.id == goal_id, Goal.user_id == user_id).values(**values).returning(Goal)
+        ).scalar_one_or_none()
     if not goal:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Goal not found"
         )
     
-    if goal_update.name is not None:
-        goal.name = goal_update.name
-    if goal_update.target is not None:
-        goal.target = goal_update.target
-    if goal_update.saved is not None:
-        goal.saved = goal_update.saved
-    if goal_update.deadline is not None:
-        goal.deadline = goal_update.deadline
-    if goal_update.type is not None:
-        goal.type = goal_update.type
-    if goal_update.is_completed is not None:
-        goal.is_completed = goal_update.is_completed
-    
     db.commit()
-    db.refresh(goal)
     return goal
 
 def delete_goal(db: Session, goal_id: UUID, user_id: UUID):
     """Delete a goal"""
-    goal = get_goal_by_id(db, goal_id, user_id)
-    if not goal:
+    result = db.execute(delete(Goal).where(Goal.id == goal_id, Goal.user_id == user_id))
+    if result.rowcount == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Goal not found"
         )
-    db.delete(goal)
     db.commit()
     return True
 
@@ -937,6 +998,92 @@ def get_monthly_transaction_total(
     
     return float(total or 0)
 
+def get_monthly_income_expense(db: Session, user_id: UUID, since: datetime) -> dict:
+    """Sum manual transactions since a date per type in one GROUP BY query.
+    Returns {"income": float, "expense": float}.
+    """
+    totals = {"income": 0.0, "expense": 0.0}
+    rows = (
+        db.query(ManualTransaction.type, func.sum(ManualTransaction.amount))
+        .filter(
+            ManualTransaction.user_id == user_id,
+            ManualTransaction.transaction_date >= since
+        )
+        .group_by(ManualTransaction.type)
+        .all()
+    )
+    for txn_type, total in rows:
+        if txn_type in totals:
+            totals[txn_type] = float(total or 0)
+    return totals
+
+def get_manual_transaction_summary(db: Session, user_id: UUID, start: datetime, end: datetime) -> list:
+    """Sum a user's manual transactions in [start, end] per calendar month, type and category
+    in one GROUP BY (months bucketed in the DB with date_trunc). Uncategorised rows are
+    additionally grouped by description so callers can still map them to a category.
+    Returns ((year, month), type, category, description, total, count) tuples.
+    """
+    month = func.date_trunc("month", ManualTransaction.transaction_date)
+    uncategorised_description = case(
+        (func.coalesce(ManualTransaction.category, "") == "", ManualTransaction.description)
+    )
+    rows = (
+        db.query(
+            month,
+            ManualTransaction.type,
+            ManualTransaction.category,
+            uncategorised_description,
+            func.sum(ManualTransaction.amount),
+            func.count()
+        )
+        .filter(
+            ManualTransaction.user_id == user_id,
+            ManualTransaction.transaction_date >= start,
+            ManualTransaction.transaction_date <= end
+        )
+        .group_by(month, ManualTransaction.type, ManualTransaction.category, uncategorised_description)
+        .all()
+    )
+    return [((month_start.year, month_start.month), txn_type, category, description, float(total or 0), count)
+            for month_start, txn_type, category, description, total, count in rows]
+
+def get_report_fingerprint(db: Session, user_id: UUID) -> tuple:
+    """Version of everything the reports read, in one round trip: (count, latest change) of the
+    user's manual transactions and of their connected connections (a sync bumps last_sync).
+    """
+    manual = db.query(
+        func.count(ManualTransaction.id).label("manual_count"),
+        func.max(func.coalesce(ManualTransaction.updated_at, ManualTransaction.created_at)).label("manual_changed")
+    ).filter(ManualTransaction.user_id == user_id).subquery()
+    connections = db.query(
+        func.count(PaymentConnection.id).label("connection_count"),
+        func.max(func.greatest(
+            func.coalesce(PaymentConnection.updated_at, PaymentConnection.created_at),
+            func.coalesce(PaymentConnection.last_sync, PaymentConnection.created_at)
+        )).label("connection_changed")
+    ).filter(
+        PaymentConnection.user_id == user_id,
+        PaymentConnection.status == "connected"
+    ).subquery()
+    return tuple(db.query(*manual.c, *connections.c).one())
+
+def get_health_score_fingerprint(db: Session, user_id: UUID) -> tuple:
+    """Version of everything the health score reads, in one round trip: (count, latest change)
+    of the user's goals and manual transactions, plus the user row's last update (monthly budget).
+    """
+    goals = db.query(
+        func.count(Goal.id).label("goal_count"),
+        func.max(func.coalesce(Goal.updated_at, Goal.created_at)).label("goal_changed")
+    ).filter(Goal.user_id == user_id).subquery()
+    manual = db.query(
+        func.count(ManualTransaction.id).label("manual_count"),
+        func.max(func.coalesce(ManualTransaction.updated_at, ManualTransaction.created_at)).label("manual_changed")
+    ).filter(ManualTransaction.user_id == user_id).subquery()
+    user_changed = db.query(
+        func.coalesce(User.updated_at, User.created_at)
+    ).filter(User.id == user_id).scalar_subquery().label("user_changed")
+    return tuple(db.query(*goals.c, *manual.c, user_changed).one())
+
 def get_connection_monthly_totals(
     db: Session,
     user_id: UUID,
@@ -1091,9 +1238,18 @@ def create_investment(db: Session, user_id: UUID, investment: InvestmentCreate):
     db.refresh(db_investment)
     return db_investment
 
-def get_user_investments(db: Session, user_id: UUID):
-    """Get all investments for a user"""
-    return db.query(Investment).filter(Investment.user_id == user_id).order_by(Investment.created_at.desc()).all()
+def get_user_investments(db: Session, user_id: UUID, skip: int = 0, limit: Optional[int] = None):
+    """Get a user's investments, newest first (`limit=None` returns all of them)"""
+    query = db.query(Investment).filter(Investment.user_id == user_id).order_by(Investment.created_at.desc()).offset(skip)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+def get_investments_fingerprint(db: Session, user_id: UUID) -> tuple:
+    """(count, latest change) of a user's investments, for ETags"""
+    return tuple(db.query(
+        func.count(Investment.id), func.max(func.coalesce(Investment.updated_at, Investment.created_at))
+    ).filter(Investment.user_id == user_id).one())
 
 def get_investment_by_id(db: Session, investment_id: UUID, user_id: UUID):
     """Get a specific investment by ID"""
@@ -1103,30 +1259,30 @@ def get_investment_by_id(db: Session, investment_id: UUID, user_id: UUID):
     ).first()
 
 def update_investment(db: Session, investment_id: UUID, user_id: UUID, investment_update: InvestmentUpdate):
-    """Update an investment"""
-    investment = get_investment_by_id(db, investment_id, user_id)
+    """Update an investment with a single UPDATE ... RETURNING"""
+    update_data = investment_update.model_dump(exclude_unset=True)
+    if not update_data:
+        investment = get_investment_by_id(db, investment_id, user_id)
+    else:
+        investment = db.execute(
+            update(Investment).where(Investment.id == investment_id, Investment.user_id == user_id).values(**update_data).returning(Investment)
+        ).scalar_one_or_none()
     if not investment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Investment not found"
         )
     
-    update_data = investment_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(investment, field, value)
-    
     db.commit()
-    db.refresh(investment)
     return investment
 
 def delete_investment(db: Session, investment_id: UUID, user_id: UUID):
     """Delete an investment"""
-    investment = get_investment_by_id(db, investment_id, user_id)
-    if not investment:
+    result = db.execute(delete(Investment).where(Investment.id == investment_id, Investment.user_id == user_id))
+    if result.rowcount == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Investment not found"
         )
-    db.delete(investment)
     db.commit()
     return True
@@ -1,14 +1,18 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, scoped_session
 from config import settings
 import os
 
+# Connection pool limits (main.py sizes the AnyIO threadpool to match)
+DB_POOL_SIZE = 10
+DB_MAX_OVERFLOW = 20
+
 # Create database engine with optimized connection pooling
 engine = create_engine(
     settings.database_url,
-    pool_size=10,           # Reduced core pool size for better resource management
-    max_overflow=20,         # Additional connections for traffic spikes
+    pool_size=DB_POOL_SIZE,           # Reduced core pool size for better resource management
+    max_overflow=DB_MAX_OVERFLOW,     # Additional connections for traffic spikes
     pool_pre_ping=True,     # Check connection health before use
     pool_recycle=1800,      # Recycle connections after 30 minutes (faster cleanup)
     pool_timeout=20,        # Reduced timeout for faster failure detection
@@ -20,6 +24,10 @@ engine = create_engine(
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Thread-scoped sessions for background tasks (they run on the threadpool, one task per thread at a time).
+# Shares the engine pool above; call BackgroundSessionLocal.remove() when the task finishes.
+BackgroundSessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+
 # Create Base class
 Base = declarative_base()
 
@@ -0,0 +1,49 @@
+"""
+Shared FastAPI dependencies
+"""
+
+import hashlib
+from typing import Optional
+from fastapi import Depends, HTTPException, Request, Response, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.orm import Session
+from database import get_db
+from auth import get_current_user_email
+from crud import CachedUser, get_cached_user_by_email
+
+security = HTTPBearer()
+
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)) -> CachedUser:
+    """Resolve the bearer token to the current user (404 if the account no longer exists).
+    FastAPI caches dependency results per request, so the lookup runs once however many
+    dependencies of an endpoint ask for it; across requests the email lookup is served
+    from crud's user cache.
+    """
+    email = get_current_user_email(credentials.credentials)
+    user = get_cached_user_by_email(db, email)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return user
+
+
+CACHE_CONTROL_REVALIDATE = "private, max-age=0, must-revalidate"
+
+def make_etag(*parts) -> str:
+    """Strong ETag: quoted BLAKE2b digest of the given version parts"""
+    return '"%s"' % hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Stamp ETag/Cache-Control on the outgoing response. If the client's If-None-Match
+    already matches, return a bare 304 for the endpoint to send instead of its body.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL_REVALIDATE}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        if etag in tags or "*" in tags:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
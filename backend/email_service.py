@@ -9,10 +9,17 @@ from sqlalchemy.orm import Session
 from models import PasswordResetToken
 from fastapi import HTTPException, status
 import ssl
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
+# Dedicated worker pool for notification emails so callers never wait on SMTP
+EMAIL_MAX_RETRIES = 3
+EMAIL_RETRY_BACKOFF_SECONDS = 2
+_email_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="email")
+
 def _format_currency(amount: float) -> str:
     try:
         amount = float(amount or 0)
@@ -143,6 +150,27 @@ def mark_token_used(db: Session, token: str):
         print(f"Error marking token as used: {str(e)}")
         return False
 
+def _send_with_retry(send_fn, kwargs: dict) -> bool:
+    """Call an email sender until it reports success, backing off exponentially between attempts"""
+    for attempt in range(1, EMAIL_MAX_RETRIES + 1):
+        try:
+            if send_fn(**kwargs):
+                return True
+        except Exception as e:
+            logger.error(f"❌ {send_fn.__name__} raised on attempt {attempt}: {e}", exc_info=True)
+        if attempt < EMAIL_MAX_RETRIES:
+            time.sleep(EMAIL_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+    logger.error(f"❌ {send_fn.__name__} failed after {EMAIL_MAX_RETRIES} attempts to {kwargs.get('email')}")
+    return False
+
+def queue_email(send_fn, **kwargs):
+    """Send an email on the background email pool (fire-and-forget, with retries)"""
+    return _email_executor.submit(_send_with_retry, send_fn, kwargs)
+
+def shutdown_email_executor():
+    """Wait for queued emails to finish sending (called on app shutdown)"""
+    _email_executor.shutdown(wait=True)
+
 def send_email_with_config(smtp_config: dict, to_email: str, subject: str, html_content: str, text_content: str = None):
     """Send email using provided SMTP configuration"""
     try:
@@ -283,7 +311,7 @@ def send_income_allocation_email(
         total_allocated: Total amount allocated across all goals
         remaining_amount: Amount remaining after allocation
         transaction_date: Date of the transaction (optional)
-        transactions: List of transaction dictionaries with keys: id, amount, date, description (optional)
+        transactions: List of IncomeTxn entries (id, amount, date, description) - optional
     """
     logger.info(f"📧 EMAIL NOTIFICATION: Preparing to send income allocation email to {email}")
     logger.info(f"📧 Income: ₹{income_amount}, Allocated: ₹{total_allocated}, Allocations: {len(allocations)} goals")
@@ -332,10 +360,10 @@ def send_income_allocation_email(
     transaction_rows = ""
     if transactions and len(transactions) > 0:
         for txn in transactions:
-            txn_id = txn.get("id", "N/A")
-            txn_amount = txn.get("amount", 0)
-            txn_date = txn.get("date")
-            txn_description = txn.get("description", "Income transaction")
+            txn_id = txn.id or "N/A"
+            txn_amount = txn.amount
+            txn_date = txn.date
+            txn_description = txn.description or "Income transaction"
             
             # Format transaction date - convert UTC to IST (UTC+5:30) for display
             if txn_date:
@@ -608,10 +636,10 @@ Date: {formatted_date}
     if transactions and len(transactions) > 0:
         text_content += "\nTransaction Details:\n"
         for txn in transactions:
-            txn_id = txn.get("id", "N/A")
-            txn_amount = txn.get("amount", 0)
-            txn_date = txn.get("date")
-            txn_description = txn.get("description", "Income transaction")
+            txn_id = txn.id or "N/A"
+            txn_amount = txn.amount
+            txn_date = txn.date
+            txn_description = txn.description or "Income transaction"
             
             # Format transaction date - convert UTC to IST (UTC+5:30) for display
             if txn_date:
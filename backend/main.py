@@ -8,11 +8,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import Response
 from routers import auth, connections, coach, goals, transactions, investments, reports, admin, health_score, affordability
-from database import engine
+from database import engine, DB_POOL_SIZE, DB_MAX_OVERFLOW
 from models import Base
 from migrationfile import check_and_migrate
 import logging
 import time
+import anyio.to_thread
 
 # Configure logging - filter out gRPC ALTS warnings
 logging.basicConfig(
@@ -72,6 +73,23 @@ def startup_event():
     else:
         logger.warning("Database migration failed or was skipped. Please check your database connection.")
 
+# Sync endpoints and background tasks run in AnyIO's threadpool and each holds at most
+# one DB connection. Cap the threads at the pool's capacity (instead of AnyIO's default 40)
+# so extra work queues for a thread rather than timing out in QueuePool after pool_timeout.
+# Must be set from inside the event loop, hence the async startup hook.
+@app.on_event("startup")
+async def configure_threadpool():
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = DB_POOL_SIZE + DB_MAX_OVERFLOW
+
+# Let queued background work (streak updates, notification emails) finish before the process exits.
+# Post-allocation jobs go first since they may still queue emails.
+@app.on_event("shutdown")
+def shutdown_executors():
+    from email_service import shutdown_email_executor
+    connections.shutdown_post_alloc_pool()
+    shutdown_email_executor()
+
 # Add health check endpoint
 @app.get("/health")
 async def health_check():
@@ -5,7 +5,8 @@ Automatically creates tables if they don't exist
 from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.exc import OperationalError
 from database import engine, get_database_url
-from models import Base, User, PasswordResetToken, PaymentConnection, Goal, ManualTransaction, Investment, UserStreak
+from models import Base, User, PasswordResetToken, PaymentConnection, Goal, ManualTransaction, Investment, UserStreak, ConnectionAllocatedTxn
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -32,10 +33,12 @@ def run_migration():
         manual_transactions_exists = table_exists(engine, "manual_transactions")
         investments_exists = table_exists(engine, "investments")
         user_streaks_exists = table_exists(engine, "user_streaks")
+        connection_allocated_txn_exists = table_exists(engine, "connection_allocated_txn")
         
         # If all tables exist, skip migration
         if (users_exists and password_reset_tokens_exists and payment_connections_exists 
-            and goals_exists and manual_transactions_exists and investments_exists and user_streaks_exists):
+            and goals_exists and manual_transactions_exists and investments_exists and user_streaks_exists
+            and connection_allocated_txn_exists):
             logger.info("All tables already exist. Skipping migration.")
             return True
         
@@ -45,6 +48,10 @@ def run_migration():
         # Create all tables defined in models
         Base.metadata.create_all(bind=engine)
         
+        # connection_allocated_txn was just created: carry over the legacy JSON lists once
+        if payment_connections_exists and not connection_allocated_txn_exists:
+            backfill_allocated_transaction_ids()
+        
         logger.info("Database migration completed successfully!")
         return True
         
@@ -58,6 +65,42 @@ def run_migration():
         traceback.print_exc()
         return False
 
+def backfill_allocated_transaction_ids(batch_size: int = 1000):
+    """Copy the legacy allocated_transaction_ids JSON lists into connection_allocated_txn.
+    Run once, when the table is created. A malformed connection_data blob is skipped, not fatal.
+    """
+    insert_ids = text(
+        "INSERT INTO connection_allocated_txn (connection_id, txn_id) "
+        "VALUES (:connection_id, :txn_id) ON CONFLICT DO NOTHING"
+    )
+    try:
+        copied = 0
+        with engine.begin() as conn:
+            rows = conn.execution_options(stream_results=True).execute(text(
+                "SELECT id, connection_data FROM payment_connections WHERE connection_data IS NOT NULL"
+            ))
+            batch = []
+            for connection_id, connection_data in rows:
+                try:
+                    data = json.loads(connection_data)
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"Skipping allocated ID backfill for connection {connection_id}: {e}")
+                    continue
+                ids = data.get("allocated_transaction_ids") if isinstance(data, dict) else None
+                if not isinstance(ids, list):
+                    continue
+                batch.extend({"connection_id": connection_id, "txn_id": str(txn_id)} for txn_id in ids if txn_id)
+                if len(batch) >= batch_size:
+                    conn.execute(insert_ids, batch)
+                    copied += len(batch)
+                    batch = []
+            if batch:
+                conn.execute(insert_ids, batch)
+                copied += len(batch)
+        logger.info(f"Backfilled connection_allocated_txn from {copied} legacy allocated transaction IDs")
+    except Exception as e:
+        logger.warning(f"Could not backfill connection_allocated_txn: {e}")
+
 def create_indexes():
     """Create indexes for better query performance"""
     try:
@@ -107,6 +150,9 @@ def create_indexes():
                 "CREATE INDEX IF NOT EXISTS idx_goals_completed ON goals(is_completed);",
                 # Composite index for common query pattern
                 "CREATE INDEX IF NOT EXISTS idx_manual_transactions_user_type_date ON manual_transactions(user_id, type, transaction_date DESC);",
+                # Serves the latest-N listing (ORDER BY transaction_date DESC LIMIT) and, via INCLUDE,
+                # index-only scans for the per-type monthly sums behind the health score
+                "CREATE INDEX IF NOT EXISTS idx_manual_transactions_user_date ON manual_transactions(user_id, transaction_date DESC) INCLUDE (type, amount);",
             ]
             
             for index_sql in indexes:
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, Numeric, Text
+from sqlalchemy import Column, String, DateTime, Boolean, Numeric, Text, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -110,4 +110,12 @@ class UserStreak(Base):
     total_savings_days = Column(Numeric(10, 0), default=0, nullable=False)  # Total days with savings
     total_transaction_days = Column(Numeric(10, 0), default=0, nullable=False)  # Total days with transactions
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+# Transaction IDs already allocated to goals, per connection (replaces the allocated_transaction_ids JSON list)
+class ConnectionAllocatedTxn(Base):
+    __tablename__ = "connection_allocated_txn"
+    
+    connection_id = Column(UUID(as_uuid=True), ForeignKey("payment_connections.id", ondelete="CASCADE"), primary_key=True)
+    txn_id = Column(String, primary_key=True)
+    allocated_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -14,6 +14,8 @@ from typing import Optional
 from datetime import datetime
 import logging
 import json
+import re
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
@@ -21,23 +23,30 @@ router = APIRouter(prefix="/api/coach", tags=["coach"])
 security = HTTPBearer()
 
 
+# Keyword rules in priority order (first matching category wins, regardless of where the keyword appears)
+_CATEGORY_KEYWORDS = [
+    ("food", ["food", "grocery", "restaurant", "meal", "tea", "snack"]),
+    ("transport", ["fuel", "transport", "uber", "taxi", "ride", "delivery"]),
+    ("bills", ["bill", "recharge", "internet", "electricity", "water", "phone"]),
+    ("health", ["medicine", "health", "hospital", "pharmacy"]),
+    ("rent", ["rent", "rental"]),
+    ("cash_income", ["salary", "wage", "income", "payment received"]),
+]
+# One compiled, case-insensitive alternation per category - a single C-level scan instead of a .lower() copy
+# plus a Python-level substring test per keyword
+_CATEGORY_PATTERNS = [
+    (category, re.compile("|".join(re.escape(word) for word in words), re.IGNORECASE))
+    for category, words in _CATEGORY_KEYWORDS
+]
+
+
+@lru_cache(maxsize=4096)
 def map_description_to_category(description: str) -> str:
     """Map transaction description to category"""
-    desc_lower = description.lower()
-    if any(word in desc_lower for word in ["food", "grocery", "restaurant", "meal", "tea", "snack"]):
-        return "food"
-    elif any(word in desc_lower for word in ["fuel", "transport", "uber", "taxi", "ride", "delivery"]):
-        return "transport"
-    elif any(word in desc_lower for word in ["bill", "recharge", "internet", "electricity", "water", "phone"]):
-        return "bills"
-    elif any(word in desc_lower for word in ["medicine", "health", "hospital", "pharmacy"]):
-        return "health"
-    elif any(word in desc_lower for word in ["rent", "rental"]):
-        return "rent"
-    elif any(word in desc_lower for word in ["salary", "wage", "income", "payment received"]):
-        return "cash_income"
-    else:
-        return "other"
+    for category, pattern in _CATEGORY_PATTERNS:
+        if pattern.search(description):
+            return category
+    return "other"
 
 
 def get_real_user_data(db: Session, user_id, user) -> dict:
@@ -1,7 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
 from database import get_db
+from models import PaymentConnection, ConnectionAllocatedTxn
 from schemas import ConnectionCreate, ConnectionResponse, ConnectionUpdate, MessageResponse, GoalCreate
 from crud import (
     create_connection,
@@ -18,37 +24,48 @@ from crud import (
     get_monthly_budget_context,
 )
 from auth import get_current_user_email
+from config import settings
 from uuid import UUID
-from typing import Optional, List
+from typing import Final, Optional, List
 from collections import defaultdict
 from routers.coach import get_real_user_data, map_description_to_category
 from services.ai_coach import analyze_and_generate_goals, analyze_and_update_goals, determine_allocation_percentages
 from schemas import GoalUpdate
 from datetime import datetime, timedelta, timezone
-import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from dataclasses import dataclass
+import orjson
 import os
+import re
 import logging
 
 logger = logging.getLogger(__name__)
 
-# IST timezone constant (UTC+5:30)
-IST_TIMEZONE = timezone(timedelta(hours=5, minutes=30))
+# IST timezone constant (UTC+5:30); module-level tzinfo singletons for the per-transaction helpers
+IST_TIMEZONE: Final = timezone(timedelta(hours=5, minutes=30))
+_UTC: Final = timezone.utc
 
 def get_ist_now():
     """Get current datetime in IST timezone"""
     return datetime.now(IST_TIMEZONE)
 
+@lru_cache(maxsize=8192)
+def _to_ist_cached(dt):
+    # Aware datetimes hash by their UTC instant, so bank feeds with repeated timestamps hit the cache
+    return dt.astimezone(IST_TIMEZONE)
+
 def to_ist(dt):
     """Convert datetime to IST timezone"""
     if dt is None:
         return None
     if dt.tzinfo is None:
         # Assume UTC if timezone-naive
-        dt = dt.replace(tzinfo=timezone.utc)
+        dt = dt.replace(tzinfo=_UTC)
     # Convert to IST
-    return dt.astimezone(IST_TIMEZONE)
+    return _to_ist_cached(dt)
 
-router = APIRouter(prefix="/connections", tags=["connections"])
+router = APIRouter(prefix="/connections", tags=["connections"], default_response_class=ORJSONResponse)
 security = HTTPBearer()
 
 def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
@@ -83,8 +100,8 @@ def load_mock_data(connection_name: str) -> dict:
     file_path = os.path.join(mock_data_dir, filename)
     
     if os.path.exists(file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(file_path, 'rb') as f:
+            return orjson.loads(f.read())
     else:
         # Return default mock data if file doesn't exist
         return {
@@ -94,46 +111,222 @@ def load_mock_data(connection_name: str) -> dict:
             "transactions": []
         }
 
+# orjson shims for the large connection_data blobs; _json_dumps returns str for the String column
+_json_loads = orjson.loads
+
+def _json_dumps(value) -> str:
+    return orjson.dumps(value).decode()
+
+def _ensure_dict(value) -> dict:
+    """Return connection_data as a dict whether it is stored as a JSON string, a dict or NULL"""
+    if type(value) is dict:
+        return value
+    if value and type(value) is str:
+        try:
+            parsed = _json_loads(value)
+        except (orjson.JSONDecodeError, TypeError) as e:
+            logger.warning("Failed to parse connection_data: %s", e)
+            return {}
+        return parsed if type(parsed) is dict else {}
+    return {}
+
+# Allocated transaction IDs live in the connection_allocated_txn table
+def _load_allocated_ids(db: Session, connection_id) -> frozenset:
+    """Set of transaction IDs already allocated for a connection"""
+    return frozenset(db.execute(
+        select(ConnectionAllocatedTxn.txn_id).where(ConnectionAllocatedTxn.connection_id == connection_id)
+    ).scalars())
+
+def _expire_cached_connection(db: Session, connection_id):
+    """Expire the session's copy of this connection (if loaded) so parsed dict connection_data is never flushed"""
+    cached_connection = db.identity_map.get(identity_key(PaymentConnection, connection_id))
+    if cached_connection is not None:
+        db.expire(cached_connection)
+
+def _save_allocated_ids(db: Session, connection_id, new_ids: list) -> int:
+    """Record newly allocated transaction IDs (one batched INSERT ... ON CONFLICT DO NOTHING) and
+    return how many rows were actually inserted
+    """
+    rows = [{"connection_id": connection_id, "txn_id": str(tid)} for tid in dict.fromkeys(new_ids) if tid]
+    if not rows:
+        return 0
+    # A loaded ORM copy may hold dict connection_data; don't let the commit flush try to write it
+    _expire_cached_connection(db, connection_id)
+    result = db.execute(pg_insert(ConnectionAllocatedTxn).values(rows).on_conflict_do_nothing())
+    db.commit()
+    if settings.debug_verify_allocation:
+        _verify_allocated_ids(db, connection_id, new_ids)
+    return result.rowcount
+
+def _verify_allocated_ids(db: Session, connection_id, new_ids: list):
+    """Debug check (DEBUG_VERIFY_ALLOCATION): re-read the table and log whether every new ID persisted"""
+    stored_ids = _load_allocated_ids(db, connection_id)
+    missing = [tid for tid in new_ids if tid and str(tid) not in stored_ids]
+    if missing:
+        logger.warning("Allocation verify: %d of %d IDs missing from connection %s: %s", len(missing), len(new_ids), connection_id, missing)
+    else:
+        logger.info("Allocation verify: all %d IDs persisted for connection %s", len(new_ids), connection_id)
+
+def _income_expense_totals(txs) -> tuple:
+    """Single pass over (date, amount, ...) tuples.
+    Returns (income_total, income_count, expense_total, expense_count); expense_total is positive.
+    """
+    income_total = expense_total = 0.0
+    income_count = expense_count = 0
+    for t in txs:
+        if not isinstance(t, (list, tuple)) or len(t) < 2:
+            continue
+        amount = float(t[1])
+        if amount > 0:
+            income_total += amount
+            income_count += 1
+        elif amount < 0:
+            expense_total -= amount
+            expense_count += 1
+    return income_total, income_count, expense_total, expense_count
+
+# Follow-up work (streak update) runs here so allocation tasks can release their DB session right after commit
+_post_alloc_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="post-alloc")
+
+def _update_savings_streak_job(user_id: str, amount: float):
+    """Update the savings streak on its own session (runs on _post_alloc_pool)"""
+    from database import BackgroundSessionLocal
+    from services.streak_service import update_savings_streak
+    streak_db = BackgroundSessionLocal()
+    try:
+        streak_result = update_savings_streak(streak_db, user_id, amount)
+        if streak_result.get("current_streak", 0) > 0:
+            logger.info("Savings streak updated: %s", streak_result.get("message", ""))
+    except Exception as streak_error:
+        logger.warning("Failed to update savings streak: %s", streak_error)
+    finally:
+        BackgroundSessionLocal.remove()
+
+def shutdown_post_alloc_pool():
+    """Wait for queued post-allocation jobs to finish (called on app shutdown)"""
+    _post_alloc_pool.shutdown(wait=True)
+
+_SPENDING_CATEGORY_LABELS = {
+    "food": "Food",
+    "transport": "Transport",
+    "bills": "Bills",
+    "health": "Health",
+    "rent": "Rent",
+    "shopping": "Shopping",
+    "entertainment": "Entertainment",
+    "other": "Other",
+}
+
+@lru_cache(maxsize=4096)
 def _format_spending_category(description: str) -> str:
-    mapped = map_description_to_category(description or "")
-    category_map = {
-        "food": "Food",
-        "transport": "Transport",
-        "bills": "Bills",
-        "health": "Health",
-        "rent": "Rent",
-        "shopping": "Shopping",
-        "entertainment": "Entertainment",
-        "other": "Other",
-    }
-    return category_map.get(mapped.lower(), "Spending")
+    return _SPENDING_CATEGORY_LABELS.get(map_description_to_category(description or ""), "Spending")
+
+# Fast path for the common "YYYY-MM-DDTHH:MM:SS[.ffffff]Z" feed format - avoids the .replace("Z", ...) copy
+_ISO_Z = re.compile(r"^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d{1,6})?)Z$")
+
+def _parse_iso_z(value: str):
+    """Parse a "...Z" ISO timestamp as an aware UTC datetime; None if it isn't in that form"""
+    m = _ISO_Z.match(value)
+    if m is None:
+        return None
+    return datetime.fromisoformat(m.group(1)).replace(tzinfo=_UTC)
+
+@lru_cache(maxsize=8192)
+def _normalize_timestamp_str(value: str):
+    """Cached string path of _normalize_timestamp - feeds repeat timestamps within and across syncs"""
+    try:
+        # Dispatch on the two shapes feeds actually send before the general path
+        if len(value) == 10:  # YYYY-MM-DD
+            dt = datetime.fromisoformat(value)
+        elif len(value) == 20 and value[19] == "Z":  # YYYY-MM-DDTHH:MM:SSZ
+            dt = datetime.fromisoformat(value[:19])
+        else:
+            dt = _parse_iso_z(value) or datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=_UTC)
+    # Already memoized here, so convert directly rather than through to_ist's cache
+    return dt.astimezone(IST_TIMEZONE)
 
 def _normalize_timestamp(value):
     """Normalize timestamp to IST timezone"""
     if not value:
         return None
+    if isinstance(value, str):
+        return _normalize_timestamp_str(value)
     try:
-        if isinstance(value, str):
-            ts = value.replace("Z", "+00:00")
-            dt = datetime.fromisoformat(ts)
-        elif isinstance(value, (int, float)):
-            dt = datetime.fromtimestamp(value, tz=timezone.utc)
-        elif isinstance(value, datetime):
-            dt = value
-        else:
-            return None
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        # Convert to IST
-        return to_ist(dt)
+        if isinstance(value, (int, float)):
+            # Epoch seconds straight to IST, no intermediate UTC datetime
+            return datetime.fromtimestamp(value, tz=IST_TIMEZONE)
+        if isinstance(value, datetime):
+            # to_ist treats naive datetimes as UTC
+            return to_ist(value)
+        return None
     except Exception:
         return None
 
+@dataclass(slots=True)
+class IncomeTxn:
+    """A new income (credit) transaction picked for allocation"""
+    amount: float
+    date: datetime
+    description: str
+    id: str
+
+def _classify_new_connection_transactions(transactions, connection_created_at, expense_window_start, connection_name) -> tuple:
+    """Split a new connection's transactions into (income after creation, debits in the expense window)"""
+    new_income_transactions = []
+    new_expense_transactions = []
+    
+    for txn in transactions:
+        if not isinstance(txn, dict):
+            continue
+        
+        txn_type = str(txn.get("type", "")).lower()
+        if txn_type not in ("credit", "debit"):
+            continue
+        amount = float(txn.get("amount", 0))
+        if amount <= 0:
+            continue
+        
+        # Parse the timestamp once (string/epoch/datetime -> aware IST datetime) for either branch
+        txn_date = _normalize_timestamp(txn.get("timestamp"))
+        
+        if txn_type == "debit":
+            if txn_date and txn_date >= expense_window_start:
+                description = txn.get("description", f"Expense via {connection_name}")
+                new_expense_transactions.append({
+                    "amount": amount,
+                    "date": txn_date,
+                    "description": description,
+                    "category": _format_spending_category(description),
+                })
+            continue
+        
+        # Income transaction (credit)
+        # Only allocate income from transactions that occurred AFTER connection was created
+        # This prevents double allocation when disconnecting and reconnecting
+        if txn_date and txn_date >= connection_created_at:
+            txn_id = txn.get("id", "")
+            new_income_transactions.append(IncomeTxn(
+                amount=amount,
+                date=txn_date,
+                description=txn.get("description", "Income from connection"),
+                id=txn_id  # Store ID for tracking
+            ))
+            logger.debug("Including transaction ₹%s (ID: %s) from %s (after connection created at %s)", amount, txn_id, txn_date, connection_created_at)
+        else:
+            logger.debug("Skipping transaction ₹%s from %s (before connection created at %s)", amount, txn_date, connection_created_at)
+    
+    return new_income_transactions, new_expense_transactions
+
 def notify_connection_spending(db_session: Session, user, new_expense_transactions: List[dict]):
     if not new_expense_transactions:
         return
     
     from email_service import (
+        queue_email,
         send_spending_activity_email,
         send_spending_budget_warning_email,
         send_spending_budget_exceeded_email,
@@ -167,7 +360,9 @@ def notify_connection_spending(db_session: Session, user, new_expense_transactio
             category_label = txn.get("category") or "Spending"
             transaction_date_iso = txn["date"].isoformat()
             
-            send_spending_activity_email(
+            # Emails go to the email pool so SMTP round-trips overlap instead of running one after another here
+            queue_email(
+                send_spending_activity_email,
                 email=user.email,
                 user_name=user_name,
                 expense_amount=txn["amount"],
@@ -184,7 +379,8 @@ def notify_connection_spending(db_session: Session, user, new_expense_transactio
                 previous_total = running_total - txn["amount"]
                 
                 if previous_total < warning_threshold <= running_total < budget_value:
-                    send_spending_budget_warning_email(
+                    queue_email(
+                        send_spending_budget_warning_email,
                         email=user.email,
                         user_name=user_name,
                         month_total=running_total,
@@ -193,7 +389,8 @@ def notify_connection_spending(db_session: Session, user, new_expense_transactio
                     )
                 
                 if previous_total < budget_value <= running_total:
-                    send_spending_budget_exceeded_email(
+                    queue_email(
+                        send_spending_budget_exceeded_email,
                         email=user.email,
                         user_name=user_name,
                         month_total=running_total,
@@ -219,7 +416,6 @@ def get_connections(
             if conn.connection_data is None:
                 logger.warning(f"Connection '{conn.name}' has NULL connection_data in database - initializing empty structure")
                 conn.connection_data = {
-                    "allocated_transaction_ids": [],
                     "transactions": [],
                     "entries": [],
                     "monthly_summary": {},
@@ -228,9 +424,11 @@ def get_connections(
                     "balance": 0
                 }
             
-            # connection_data is already parsed by get_user_connections when parse_json=True
+            # connection_data is already parsed by get_user_connections when parse_json=True.
+            # Trim a shallow copy - parsed connection_data dicts may be shared with crud's cache
             if conn.connection_data and isinstance(conn.connection_data, dict):
-                parsed = conn.connection_data
+                parsed = dict(conn.connection_data)
+                conn.connection_data = parsed
                 if include_transactions:
                     # Include transactions but limit to recent 200 to prevent huge payloads
                     # Frontend will further limit to 100 per connection
@@ -240,7 +438,7 @@ def get_connections(
                             logger.info(f"Connection '{conn.name}' has {len(transactions)} transactions")
                             if len(transactions) > 200:
                                 parsed["transactions"] = transactions[:200]
-                                logger.debug(f"Limited transactions to 200 for connection {conn.id}")
+                                logger.debug("Limited transactions to 200 for connection %s", conn.id)
                         else:
                             logger.warning(f"Connection '{conn.name}' has non-list transactions: {type(transactions)}")
                     else:
@@ -251,7 +449,7 @@ def get_connections(
                             logger.info(f"Connection '{conn.name}' has {len(entries)} entries")
                             if len(entries) > 200:
                                 parsed["entries"] = entries[:200]
-                                logger.debug(f"Limited entries to 200 for connection {conn.id}")
+                                logger.debug("Limited entries to 200 for connection %s", conn.id)
                 else:
                     # Remove transaction arrays if not requested (for list view optimization)
                     if "transactions" in parsed:
@@ -265,7 +463,7 @@ def get_connections(
             elif conn.connection_data and isinstance(conn.connection_data, str):
                 # Fallback: if somehow still a string, parse it
                 try:
-                    parsed = json.loads(conn.connection_data)
+                    parsed = _json_loads(conn.connection_data)
                     if isinstance(parsed, dict):
                         conn.connection_data = parsed
                         # Apply same logic as above
@@ -281,10 +479,9 @@ def get_connections(
                             if "entries" in parsed:
                                 parsed["entry_count"] = len(parsed.get("entries", []))
                                 parsed["entries"] = []
-                except (json.JSONDecodeError, TypeError, ValueError) as e:
+                except (orjson.JSONDecodeError, TypeError, ValueError) as e:
                     logger.error(f"Failed to parse connection_data for connection '{conn.name}': {e}")
                     conn.connection_data = {
-                        "allocated_transaction_ids": [],
                         "transactions": [],
                         "entries": [],
                         "monthly_summary": {},
@@ -322,8 +519,8 @@ def process_goals_after_connection(user_id: UUID):
     logger.info(f"BACKGROUND TASK STARTED: Processing goals for user {user_id}")
     try:
         # Get a new database session for background task
-        from database import SessionLocal
-        background_db = SessionLocal()
+        from database import BackgroundSessionLocal
+        background_db = BackgroundSessionLocal()
         try:
             user = get_user_by_id(background_db, str(user_id))
             if not user:
@@ -594,110 +791,78 @@ def process_goals_after_connection(user_id: UUID):
                 else:
                     logger.info(f"No goal updates needed for user {user_id} - targets are appropriate for current income.")
         finally:
-            background_db.close()
+            BackgroundSessionLocal.remove()
             logger.info(f"BACKGROUND TASK COMPLETED for user {user_id}")
     except Exception as e:
         logger.error(f"❌ CRITICAL ERROR in background goal processing for user {user_id}: {e}", exc_info=True)
 
 
-def allocate_income_from_sync(user_id: UUID, connection_id: UUID, new_income_transactions: List[dict], previous_last_sync):
+def allocate_income_from_sync(user_id: UUID, connection_id: UUID, new_income_transactions: List[IncomeTxn], previous_last_sync):
     """Background task to allocate income from sync operation"""
-    logger.info(f"BACKGROUND TASK STARTED: Allocating income from sync for connection {connection_id} for user {user_id}")
+    logger.info("BACKGROUND TASK STARTED: Allocating income from sync for connection %s for user %s", connection_id, user_id)
     try:
-        from database import SessionLocal
-        from crud import get_connection_by_id, get_user_by_id
+        from database import BackgroundSessionLocal
+        from crud import get_user_by_id, get_goals_for_user
         from routers.coach import get_real_user_data
         from services.agentic_ai import ToolRegistry, ToolType
-        from services.ai_coach import emergency_fund_agent, determine_allocation_percentages
+        from services.ai_coach import emergency_fund_agent, cached_agent, determine_allocation_percentages, income_based_goal_targets
         from datetime import datetime, timedelta, timezone
-        import json
         
-        background_db = SessionLocal()
+        background_db = BackgroundSessionLocal()
         try:
             user = get_user_by_id(background_db, str(user_id))
             if not user:
-                logger.warning(f"User not found for income allocation: {user_id}")
+                logger.warning("User not found for income allocation: %s", user_id)
                 return
             
-            # Get the connection
-            connection = get_connection_by_id(background_db, connection_id, user_id)
-            if not connection:
-                logger.warning(f"Connection {connection_id} not found for income allocation")
+            # Only the connection's id and name are needed; allocated IDs live in connection_allocated_txn,
+            # so the connection_data blob is not fetched at all.
+            connection_row = background_db.execute(
+                select(PaymentConnection.id, PaymentConnection.name).where(
+                    PaymentConnection.id == connection_id,
+                    PaymentConnection.user_id == user_id
+                )
+            ).one_or_none()
+            if not connection_row:
+                logger.warning("Connection %s not found for income allocation", connection_id)
                 return
             
-            # CRITICAL: get_connection_by_id parses connection_data to dict, which causes issues
-            # when SQLAlchemy tries to save it. We need to expire it and refresh to get raw string.
-            # But we'll work with the dict for processing, then convert back to string when saving.
-            background_db.expire(connection, ['connection_data'])
-            background_db.refresh(connection, ['connection_data'])
-            
-            # Now parse it ourselves for processing
-            raw_connection_data = connection.connection_data
-            
-            # Parse connection data from raw string
-            connection_data = None
-            if raw_connection_data:
-                try:
-                    if isinstance(raw_connection_data, str):
-                        connection_data = json.loads(raw_connection_data)
-                    elif isinstance(raw_connection_data, dict):
-                        connection_data = raw_connection_data
-                except (json.JSONDecodeError, TypeError) as e:
-                    logger.warning(f"Failed to parse connection_data: {e}")
-                    connection_data = {}
-            
-            if connection_data is None:
-                logger.warning(f"⚠️  Background task: connection_data is None for connection {connection_id}, initializing empty dict")
-                connection_data = {}
-            elif isinstance(connection_data, str):
-                try:
-                    connection_data = json.loads(connection_data)
-                    logger.info(f"✅ Background task: Parsed connection_data from JSON string (keys: {list(connection_data.keys()) if isinstance(connection_data, dict) else 'not a dict'})")
-                except Exception as e:
-                    logger.warning(f"⚠️  Background task: Failed to parse connection_data: {e}")
-                    connection_data = {}
-            elif isinstance(connection_data, dict):
-                logger.info(f"✅ Background task: connection_data is already a dict (keys: {list(connection_data.keys())})")
-            
-            # Ensure connection_data is a dict
-            if not isinstance(connection_data, dict):
-                logger.warning(f"⚠️  Background task: connection_data is not a dict (type: {type(connection_data)}), initializing empty dict")
-                connection_data = {}
-            
-            # CRITICAL: Initialize allocated_transaction_ids if it doesn't exist
-            if "allocated_transaction_ids" not in connection_data:
-                connection_data["allocated_transaction_ids"] = []
-                logger.info(f"✅ Background task: Initialized allocated_transaction_ids list")
-            else:
-                existing_count = len(connection_data.get("allocated_transaction_ids", []))
-                logger.info(f"✅ Background task: Found {existing_count} existing allocated transaction IDs")
-            
             # DOUBLE-CHECK: Verify transactions haven't been allocated already
             # This prevents double allocation if background task runs multiple times
-            allocated_txn_ids = set()
-            if connection_data and isinstance(connection_data, dict):
-                allocated_txn_ids = set(connection_data.get("allocated_transaction_ids", []))
+            allocated_txn_ids = _load_allocated_ids(background_db, connection_id)
+            logger.info("Background task: Found %d existing allocated transaction IDs", len(allocated_txn_ids))
             
             # Filter out transactions that are already allocated
             filtered_transactions = []
             for txn in new_income_transactions:
-                txn_id = txn.get("id", "")
+                txn_id = txn.id
                 if txn_id and txn_id in allocated_txn_ids:
-                    logger.info(f"⏭️  Background task: Skipping transaction ₹{txn.get('amount')} (ID: {txn_id}) - already allocated")
+                    logger.debug("Background task: Skipping transaction %s (ID: %s) - already allocated", txn.amount, txn_id)
                     continue
                 filtered_transactions.append(txn)
             
             if not filtered_transactions:
-                logger.info(f"No new unallocated transactions to process for connection {connection_id} (all were already allocated)")
+                logger.info("No new unallocated transactions to process for connection %s (all were already allocated)", connection_id)
                 return
             
             # Update new_income_transactions to only include unallocated ones
             new_income_transactions = filtered_transactions
-            logger.info(f"Background task: Filtered {len(new_income_transactions)} unallocated transactions from {len(new_income_transactions) + len(allocated_txn_ids)} total")
+            logger.info("Background task: Filtered %d unallocated transactions from %d total", len(new_income_transactions), len(new_income_transactions) + len(allocated_txn_ids))
             
-            total_new_income = sum(t["amount"] for t in new_income_transactions)
-            transaction_details = ", ".join([f"₹{t['amount']}" for t in new_income_transactions])
-            logger.info(f"💰 Allocating ₹{total_new_income} new income from connection '{connection.name}' ({transaction_details})...")
+            total_new_income = sum(t.amount for t in new_income_transactions)
+            
+            # Skip the agent/LLM pipeline for trivially small income (refunds, cashback pings),
+            # but still mark it as allocated so the next sync doesn't pick it up again
+            if total_new_income < settings.min_allocation_income:
+                logger.info("Income %s below allocation threshold %s, skipping allocation pipeline", total_new_income, settings.min_allocation_income)
+                skipped_ids = [t.id for t in new_income_transactions if t.id]
+                if skipped_ids:
+                    _save_allocated_ids(background_db, connection_id, skipped_ids)
+                return
+            
+            if logger.isEnabledFor(logging.INFO):
+                transaction_details = ", ".join(str(t.amount) for t in new_income_transactions)
+                logger.info("Allocating %s new income from connection '%s' (%s)...", total_new_income, connection_row.name, transaction_details)
             
             # Initialize tool registry (Agentic AI tools)
             tool_registry = ToolRegistry(background_db, user_id)
@@ -706,38 +871,22 @@ def allocate_income_from_sync(user_id: UUID, connection_id: UUID, new_income_tra
             user_data = get_real_user_data(background_db, user_id, user)
             
             # Ensure emergency fund goal has proper target
-            emergency_analysis = emergency_fund_agent(user_data)
+            emergency_analysis = cached_agent("emergency_fund", user_id, user_data, emergency_fund_agent)
+            
+            # Income-based goal targets from the last 3 months (drive STEP 0 and STEP 1)
+            targets = income_based_goal_targets(user_data, total_new_income)
             
             # Get all goals
-            goals_result = tool_registry.execute_tool(ToolType.GET_GOALS, {}, "connection_sync")
+            # Direct CRUD call - the generic tool dispatch adds nothing for this background pipeline
+            goals = get_goals_for_user(background_db, user_id)
             
             # STEP 0: If no goals exist, create them automatically based on income
-            if not goals_result.get("success") or not goals_result.get("goals") or len(goals_result.get("goals", [])) == 0:
+            if not goals:
                 logger.info("No goals found. Creating goals automatically based on connection income...")
                 
-                # Analyze income to create adaptive goals
-                from services.ai_coach import income_pattern_agent, get_last_3_months_transactions
-                income_analysis = income_pattern_agent(user_data)
-                
-                # Calculate average monthly income
-                recent_txs = get_last_3_months_transactions(user_data)
-                income_txs = [t for t in recent_txs if float(t[1]) > 0]
-                total_income = sum(float(t[1]) for t in income_txs) if income_txs else total_new_income
-                avg_monthly_income = total_income / max(3, len(income_txs)) if income_txs else total_new_income * 30
-                
-                if avg_monthly_income == 0:
-                    avg_monthly_income = total_new_income * 30
-                
-                # Calculate adaptive goal targets
-                avg_monthly_expenses = avg_monthly_income * 0.7
-                emergency_fund_target = int(avg_monthly_expenses * 4.5)
-                savings_goal_1_target = int(avg_monthly_income * 2)
-                savings_goal_2_target = int(avg_monthly_income * 1.5)
-                
-                # Ensure minimum values
-                emergency_fund_target = max(10000, emergency_fund_target)
-                savings_goal_1_target = max(5000, savings_goal_1_target)
-                savings_goal_2_target = max(3000, savings_goal_2_target)
+                emergency_fund_target = targets["emergency_target"]
+                savings_goal_1_target = targets["savings_1_target"]
+                savings_goal_2_target = targets["savings_2_target"]
                 
                 # Create goals
                 from schemas import GoalCreate
@@ -757,9 +906,9 @@ def allocate_income_from_sync(user_id: UUID, connection_id: UUID, new_income_tra
                     )
                     created_emergency = create_goal(background_db, user_id, emergency_goal)
                     goals_created.append(created_emergency)
-                    logger.info(f"Created Emergency Fund goal: ₹{emergency_fund_target:,}")
+                    logger.info("Created Emergency Fund goal: %d", emergency_fund_target)
                 except Exception as e:
-                    logger.error(f"Error creating emergency fund: {e}")
+                    logger.error("Error creating emergency fund: %s", e)
                 
                 # Create Savings Goals
                 try:
@@ -772,9 +921,9 @@ def allocate_income_from_sync(user_id: UUID, connection_id: UUID, new_income_tra
                     )
                     created_savings1 = create_goal(background_db, user_id, savings_goal_1)
                     goals_created.append(created_savings1)
-                    logger.info(f"Created Savings Goal 1: ₹{savings_goal_1_target:,}")
+                    logger.info("Created Savings Goal 1: %d", savings_goal_1_target)
                 except Exception as e:
-                    logger.error(f"Error creating savings goal 1: {e}")
+                    logger.error("Error creating savings goal 1: %s", e)
                 
                 try:
                     savings_goal_2 = GoalCreate(
@@ -786,99 +935,98 @@ def allocate_income_from_sync(user_id: UUID, connection_id: UUID, new_income_tra
                     )
                     created_savings2 = create_goal(background_db, user_id, savings_goal_2)
                     goals_created.append(created_savings2)
-                    logger.info(f"Created Savings Goal 2: ₹{savings_goal_2_target:,}")
+                    logger.info("Created Savings Goal 2: %d", savings_goal_2_target)
                 except Exception as e:
-                    logger.error(f"Error creating savings goal 2: {e}")
+                    logger.error("Error creating savings goal 2: %s", e)
                 
                 if goals_created:
-                    logger.info(f"Successfully created {len(goals_created)} goals automatically based on connection income")
-                    goals_result = tool_registry.execute_tool(ToolType.GET_GOALS, {}, "connection_sync")
+                    logger.info("Successfully created %d goals automatically based on connection income", len(goals_created))
+                    goals = get_goals_for_user(background_db, user_id)
             
-            if not goals_result.get("success") or not goals_result.get("goals"):
+            if not goals:
                 logger.warning("No goals found after creation attempt, skipping allocation")
                 return
             
-            goals = goals_result["goals"]
-            
-            # STEP 1: Update goal targets adaptively based on income changes
-            from services.ai_coach import income_pattern_agent, get_last_3_months_transactions
-            income_analysis = income_pattern_agent(user_data)
+            # Kick off the LLM allocation plan while the adaptive target updates below run against the DB.
+            # The plan only reads a snapshot of the current goals and user_data, never background_db.
+            active_goals_snapshot = [dict(g) for g in goals if not g.get("is_completed", False)]
+            _, _, expense_total, expense_count = _income_expense_totals(user_data.get("transactions", []))
+            recent_expenses = expense_total / max(1, expense_count / 30) if expense_count else None
             
-            # Calculate average monthly income
-            recent_txs = get_last_3_months_transactions(user_data)
-            income_txs = [t for t in recent_txs if float(t[1]) > 0]
-            total_income = sum(float(t[1]) for t in income_txs) if income_txs else total_new_income
-            avg_monthly_income = total_income / max(3, len(income_txs)) if income_txs else total_new_income * 30
-            
-            if avg_monthly_income == 0:
-                avg_monthly_income = total_new_income * 30
-            
-            # Calculate new recommended targets
-            avg_monthly_expenses = avg_monthly_income * 0.7
-            new_emergency_target = int(avg_monthly_expenses * 4.5)
-            new_savings_1_target = int(avg_monthly_income * 2)
-            new_savings_2_target = int(avg_monthly_income * 1.5)
-            
-            # Ensure minimum values
-            new_emergency_target = max(10000, new_emergency_target)
-            new_savings_1_target = max(5000, new_savings_1_target)
-            new_savings_2_target = max(3000, new_savings_2_target)
-            
-            # Update emergency fund target adaptively
-            if emergency_analysis.get("recommended_buffer"):
-                all_emergency_goals = [g for g in goals if g.get("type") == "emergency"]
-                active_emergency_goals = [g for g in all_emergency_goals if not g.get("is_completed", False)]
-                emergency_goals = active_emergency_goals if active_emergency_goals else all_emergency_goals
+            with ThreadPoolExecutor(max_workers=1) as plan_executor:
+                plan_future = None
+                if active_goals_snapshot:
+                    plan_future = plan_executor.submit(
+                        determine_allocation_percentages,
+                        total_new_income,
+                        user_data,
+                        active_goals_snapshot,
+                        recent_expenses
+                    )
                 
-                for goal in emergency_goals:
-                    current_target = float(goal.get("target", 0))
-                    recommended = max(emergency_analysis["recommended_buffer"], new_emergency_target)
-                    is_completed = goal.get("is_completed", False)
+                # STEP 1: Update goal targets adaptively based on income changes
+                new_emergency_target = targets["emergency_target"]
+                new_savings_1_target = targets["savings_1_target"]
+                new_savings_2_target = targets["savings_2_target"]
+                
+                # Update emergency fund target adaptively
+                if emergency_analysis.get("recommended_buffer"):
+                    all_emergency_goals = [g for g in goals if g.get("type") == "emergency"]
+                    active_emergency_goals = [g for g in all_emergency_goals if not g.get("is_completed", False)]
+                    emergency_goals = active_emergency_goals if active_emergency_goals else all_emergency_goals
+                
+                    for goal in emergency_goals:
+                        current_target = float(goal.get("target", 0))
+                        recommended = max(emergency_analysis["recommended_buffer"], new_emergency_target)
+                        is_completed = goal.get("is_completed", False)
                     
-                    if is_completed:
-                        continue
+                        if is_completed:
+                            continue
                     
-                    income_increased = recommended > current_target * 1.2
-                    if current_target == 0 or current_target < recommended * 0.8 or income_increased:
+                        income_increased = recommended > current_target * 1.2
+                        if current_target == 0 or current_target < recommended * 0.8 or income_increased:
+                            update_result = tool_registry.execute_tool(
+                                ToolType.UPDATE_GOAL,
+                                {"goal_id": goal["id"], "target": recommended},
+                                "connection_sync"
+                            )
+                            if update_result.get("success"):
+                                goal["target"] = float(recommended)
+                                logger.info("Updated Emergency Fund target from %.0f to %.0f (income-based adjustment)", current_target, recommended)
+                
+                # Update savings goals adaptively
+                regular_goals = [g for g in goals if g.get("type") != "emergency" and not g.get("is_completed", False)]
+                
+                if len(regular_goals) > 0:
+                    goal_1 = regular_goals[0]
+                    current_target_1 = float(goal_1.get("target", 0))
+                    if current_target_1 == 0 or current_target_1 < new_savings_1_target * 0.8 or new_savings_1_target > current_target_1 * 1.2:
                         update_result = tool_registry.execute_tool(
                             ToolType.UPDATE_GOAL,
-                            {"goal_id": goal["id"], "target": recommended},
+                            {"goal_id": goal_1["id"], "target": new_savings_1_target},
                             "connection_sync"
                         )
                         if update_result.get("success"):
-                            logger.info(f"Updated Emergency Fund target from ₹{current_target:,} to ₹{recommended:,} (income-based adjustment)")
-            
-            # Update savings goals adaptively
-            regular_goals = [g for g in goals if g.get("type") != "emergency" and not g.get("is_completed", False)]
-            
-            if len(regular_goals) > 0:
-                goal_1 = regular_goals[0]
-                current_target_1 = float(goal_1.get("target", 0))
-                if current_target_1 == 0 or current_target_1 < new_savings_1_target * 0.8 or new_savings_1_target > current_target_1 * 1.2:
-                    update_result = tool_registry.execute_tool(
-                        ToolType.UPDATE_GOAL,
-                        {"goal_id": goal_1["id"], "target": new_savings_1_target},
-                        "connection_sync"
-                    )
-                    if update_result.get("success"):
-                        logger.info(f"Updated '{goal_1.get('name')}' target from ₹{current_target_1:,} to ₹{new_savings_1_target:,} (income-based adjustment)")
-            
-            if len(regular_goals) > 1:
-                goal_2 = regular_goals[1]
-                current_target_2 = float(goal_2.get("target", 0))
-                if current_target_2 == 0 or current_target_2 < new_savings_2_target * 0.8 or new_savings_2_target > current_target_2 * 1.2:
-                    update_result = tool_registry.execute_tool(
-                        ToolType.UPDATE_GOAL,
-                        {"goal_id": goal_2["id"], "target": new_savings_2_target},
-                        "connection_sync"
-                    )
-                    if update_result.get("success"):
-                        logger.info(f"Updated '{goal_2.get('name')}' target from ₹{current_target_2:,} to ₹{new_savings_2_target:,} (income-based adjustment)")
-            
-            # Refresh goals after updates
-            goals_result = tool_registry.execute_tool(ToolType.GET_GOALS, {}, "connection_sync")
-            if goals_result.get("success"):
-                goals = goals_result["goals"]
+                            goal_1["target"] = float(new_savings_1_target)
+                            logger.info("Updated '%s' target from %.0f to %d (income-based adjustment)", goal_1.get("name"), current_target_1, new_savings_1_target)
+                
+                if len(regular_goals) > 1:
+                    goal_2 = regular_goals[1]
+                    current_target_2 = float(goal_2.get("target", 0))
+                    if current_target_2 == 0 or current_target_2 < new_savings_2_target * 0.8 or new_savings_2_target > current_target_2 * 1.2:
+                        update_result = tool_registry.execute_tool(
+                            ToolType.UPDATE_GOAL,
+                            {"goal_id": goal_2["id"], "target": new_savings_2_target},
+                            "connection_sync"
+                        )
+                        if update_result.get("success"):
+                            goal_2["target"] = float(new_savings_2_target)
+                            logger.info("Updated '%s' target from %.0f to %d (income-based adjustment)", goal_2.get("name"), current_target_2, new_savings_2_target)
+                
+                # Targets were updated in place on the local goal dicts above, so no re-fetch is needed
+                
+                # Wait for the allocation plan (LLM) started before the target updates
+                allocation_plan = plan_future.result() if plan_future else None
             
             # Use LLM to determine optimal allocation percentages based on financial context
             active_goals = [g for g in goals if not g.get("is_completed", False)]
@@ -886,21 +1034,15 @@ def allocate_income_from_sync(user_id: UUID, connection_id: UUID, new_income_tra
             # Initialize allocation_actions list (will be populated if allocations happen)
             allocation_actions = []
             
-            if active_goals:
-                # Calculate recent expenses for context
-                recent_txs = user_data.get("transactions", [])
-                expense_txs = [t for t in recent_txs if isinstance(t, (list, tuple)) and len(t) > 1 and float(t[1]) < 0]
-                recent_expenses = abs(sum(float(t[1]) for t in expense_txs)) / max(1, len(expense_txs) / 30) if expense_txs else None
-                
-                # Get LLM-determined allocation percentages
-                allocation_plan = determine_allocation_percentages(
-                    income_amount=total_new_income,
-                    user_data=user_data,
-                    goals=active_goals,
-                    recent_expenses=recent_expenses
-                )
-                
-                logger.info(f"LLM Allocation Plan: {allocation_plan.get('reasoning', 'N/A')} - Emergency: {allocation_plan.get('emergency_fund', {}).get('percent', 0)}%, Goals: {sum(g.get('percent', 0) for g in allocation_plan.get('goal_allocations', []))}%, Remaining: {allocation_plan.get('remaining_percent', 0)}%")
+            if active_goals and allocation_plan:
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(
+                        "LLM Allocation Plan: %s - Emergency: %s%%, Goals: %s%%, Remaining: %s%%",
+                        allocation_plan.get("reasoning", "N/A"),
+                        allocation_plan.get("emergency_fund", {}).get("percent", 0),
+                        sum(g.get("percent", 0) for g in allocation_plan.get("goal_allocations", [])),
+                        allocation_plan.get("remaining_percent", 0)
+                    )
                 
                 # Allocate to Emergency Fund (if exists and not completed)
                 emergency_goals = [g for g in active_goals if g.get("type") == "emergency"]
@@ -921,28 +1063,25 @@ def allocate_income_from_sync(user_id: UUID, connection_id: UUID, new_income_tra
                             )
                             if result.get("success"):
                                 allocation_actions.append(result)
-                                logger.info(f"Auto-allocated ₹{emergency_allocation} ({allocation_plan.get('emergency_fund', {}).get('percent', 0)}%) to Emergency Fund from connection income (LLM-determined)")
+                                logger.info("Auto-allocated %s (%s%%) to Emergency Fund from connection income (LLM-determined)", emergency_allocation, allocation_plan.get("emergency_fund", {}).get("percent", 0))
                 
                 # Allocate to regular goals based on LLM percentages
                 regular_goals = [g for g in active_goals if g.get("type") != "emergency"]
+                regular_goals_by_id = {str(g["id"]): g for g in regular_goals}
                 goal_allocations = allocation_plan.get("goal_allocations", [])
                 
                 # Match LLM allocation plan to actual goals
                 for goal_alloc in goal_allocations:
-                    goal_id = goal_alloc.get("goal_id")
                     goal_amount = goal_alloc.get("amount", 0)
                     
                     # Find matching goal
-                    matching_goal = None
-                    for goal in regular_goals:
-                        if str(goal.get("id")) == str(goal_id):
-                            matching_goal = goal
-                            break
+                    matching_goal = regular_goals_by_id.get(str(goal_alloc.get("goal_id")))
                     
                     if not matching_goal and regular_goals:
                         # If goal_id doesn't match, use first available goal
                         matching_goal = regular_goals[0]
                         regular_goals = regular_goals[1:]  # Remove to avoid duplicate allocation
+                        regular_goals_by_id.pop(str(matching_goal["id"]), None)
                     
                     if matching_goal and goal_amount > 0:
                         goal_target = float(matching_goal.get("target", 0))
@@ -950,7 +1089,7 @@ def allocate_income_from_sync(user_id: UUID, connection_id: UUID, new_income_tra
                         goal_remaining = goal_target - goal_saved
                         
                         if goal_target == 0:
-                            logger.warning(f"Goal '{matching_goal.get('name')}' has target 0, skipping allocation")
+                            logger.warning("Goal '%s' has target 0, skipping allocation", matching_goal.get("name"))
                             continue
                         
                         if goal_remaining > 0:
@@ -963,42 +1102,32 @@ def allocate_income_from_sync(user_id: UUID, connection_id: UUID, new_income_tra
                                 )
                                 if result.get("success"):
                                     allocation_actions.append(result)
-                                    logger.info(f"Auto-allocated ₹{goal_allocation} ({goal_alloc.get('percent', 0)}%) to goal '{matching_goal['name']}' from connection income (LLM-determined)")
+                                    logger.info("Auto-allocated %s (%s%%) to goal '%s' from connection income (LLM-determined)", goal_allocation, goal_alloc.get("percent", 0), matching_goal["name"])
                 
                 if allocation_actions:
                     total_allocated = sum(a.get("allocated", 0) for a in allocation_actions)
                     remaining_for_user = total_new_income - total_allocated
-                    logger.info(f"Successfully allocated ₹{total_allocated} ({(total_allocated/total_new_income*100):.1f}%) from ₹{total_new_income} connection income to {len(allocation_actions)} goals using LLM-determined percentages. User has ₹{remaining_for_user} ({(remaining_for_user/total_new_income*100):.1f}%) remaining.")
+                    logger.info("Successfully allocated %s (%.1f%%) from %s connection income to %d goals using LLM-determined percentages. User has %s (%.1f%%) remaining.", total_allocated, total_allocated / total_new_income * 100, total_new_income, len(allocation_actions), remaining_for_user, remaining_for_user / total_new_income * 100)
                     
                     # Update savings streak (non-blocking)
-                    try:
-                        from services.streak_service import update_savings_streak
-                        streak_result = update_savings_streak(background_db, str(user_id), total_allocated)
-                        if streak_result.get("current_streak", 0) > 0:
-                            logger.info(f"Savings streak updated: {streak_result.get('message', '')}")
-                    except Exception as streak_error:
-                        logger.warning(f"Failed to update savings streak: {streak_error}")
+                    _post_alloc_pool.submit(_update_savings_streak_job, str(user_id), total_allocated)
                     
                     # Prepare allocation details for email
-                    from email_service import send_income_allocation_email
+                    from email_service import send_income_allocation_email, queue_email
                     
                     try:
                         user = get_user_by_id(background_db, str(user_id))
                         if user:
+                            goals_by_id = {str(g["id"]): g for g in active_goals}
                             email_allocations = []
                             for action in allocation_actions:
-                                goal_id = action.get("goal_id")
                                 allocated_amount = action.get("allocated", 0)
                                 percent = (allocated_amount / total_new_income * 100) if total_new_income > 0 else 0
                                 
                                 # Get goal details
-                                goal_name = "Unknown Goal"
-                                goal_type = "savings"
-                                for goal in active_goals:
-                                    if str(goal.get("id")) == str(goal_id):
-                                        goal_name = goal.get("name", "Unknown Goal")
-                                        goal_type = goal.get("type", "savings")
-                                        break
+                                goal = goals_by_id.get(str(action.get("goal_id")), {})
+                                goal_name = goal.get("name", "Unknown Goal")
+                                goal_type = goal.get("type", "savings")
                                 
                                 email_allocations.append({
                                     "goal_name": goal_name,
@@ -1007,9 +1136,10 @@ def allocate_income_from_sync(user_id: UUID, connection_id: UUID, new_income_tra
                                     "goal_type": goal_type
                                 })
                             
-                            # Send email notification
+                            # Send email notification on the email pool so SMTP latency/retries don't hold up this task
                             user_name = f"{user.first_name or ''} {user.last_name or ''}".strip() or user.email.split('@')[0]
-                            send_income_allocation_email(
+                            queue_email(
+                                send_income_allocation_email,
                                 email=user.email,
                                 user_name=user_name,
                                 income_amount=total_new_income,
@@ -1020,104 +1150,37 @@ def allocate_income_from_sync(user_id: UUID, connection_id: UUID, new_income_tra
                                 transactions=new_income_transactions
                             )
                     except Exception as email_error:
-                        logger.error(f"Failed to send income allocation email during sync: {email_error}", exc_info=True)
+                        logger.error("Failed to send income allocation email during sync: %s", email_error, exc_info=True)
             else:
-                logger.info(f"No active goals found - income allocation skipped (goals will be created first)")
+                logger.info("No active goals found - income allocation skipped (goals will be created first)")
             
-            # CRITICAL: Mark these transactions as allocated by storing their IDs in connection metadata
+            # CRITICAL: Mark these transactions as allocated by recording their IDs in connection_allocated_txn
             # This prevents double allocation even if last_sync is reset
             # IMPORTANT: Only mark as allocated if actual allocations happened (allocation_actions is not empty)
             # If there are no active goals, DON'T mark them as allocated so they can be allocated later when goals are created
             if allocation_actions and new_income_transactions:
                 # Get transaction IDs that were processed (allocated or skipped due to no goals)
-                allocated_ids = [t.get("id") for t in new_income_transactions if t.get("id")]
+                allocated_ids = [t.id for t in new_income_transactions if t.id]
                 
                 if allocated_ids:
-                    # Ensure connection_data exists and is a dict
-                    if connection_data is None:
-                        connection_data = {}
-                    elif isinstance(connection_data, str):
-                        try:
-                            connection_data = json.loads(connection_data)
-                        except:
-                            connection_data = {}
-                    
-                    if not isinstance(connection_data, dict):
-                        connection_data = {}
-                    
-                    # Initialize allocated_transaction_ids if it doesn't exist
-                    if "allocated_transaction_ids" not in connection_data:
-                        connection_data["allocated_transaction_ids"] = []
-                    
-                    # Add new IDs (avoid duplicates)
-                    existing_allocated = set(connection_data["allocated_transaction_ids"])
-                    new_ids = [tid for tid in allocated_ids if tid and tid not in existing_allocated]
+                    # Add new IDs (avoid duplicates; allocated_txn_ids was loaded from connection_allocated_txn at the top)
+                    new_ids = [tid for tid in allocated_ids if tid not in allocated_txn_ids]
                     
                     if new_ids:
-                        connection_data["allocated_transaction_ids"].extend(new_ids)
-                        
-                        # Save updated connection_data back to database
-                        from schemas import ConnectionUpdate
-                        from crud import update_connection
-                        connection_update = ConnectionUpdate(connection_data=connection_data)
-                        
-                        # CRITICAL: Log what we're about to save
-                        logger.info(f"🔄 Background task: About to save connection_data with {len(connection_data.get('transactions', []))} transactions, {len(connection_data.get('allocated_transaction_ids', []))} allocated IDs")
-                        
-                        updated_connection = update_connection(background_db, connection_id, user_id, connection_update)
-                        
-                        # CRITICAL: update_connection already commits, but verify it worked
-                        # No need to commit again - update_connection handles it
-                        logger.info(f"✅ Background task: update_connection completed (it commits internally)")
-                        
-                        # CRITICAL: Verify the data was saved by querying directly
-                        from sqlalchemy import text
-                        result = background_db.execute(
-                            text("SELECT connection_data FROM payment_connections WHERE id = :id"),
-                            {"id": connection_id}
-                        ).first()
-                        
-                        if result and result[0]:
-                            import json
-                            saved_data = json.loads(result[0])
-                            saved_txn_count = len(saved_data.get("transactions", []))
-                            saved_allocated_count = len(saved_data.get("allocated_transaction_ids", []))
-                            logger.info(f"✅ Background task: Verified {saved_txn_count} transactions and {saved_allocated_count} allocated IDs in database")
-                        else:
-                            logger.error(f"❌ Background task: CRITICAL - connection_data is NULL in database after commit!")
-                        
-                        # CRITICAL: Verify the data was saved
-                        if updated_connection and updated_connection.connection_data:
-                            if isinstance(updated_connection.connection_data, dict):
-                                saved_ids = updated_connection.connection_data.get("allocated_transaction_ids", [])
-                                logger.info(f"✅ Marked {len(new_ids)} transaction IDs as allocated in connection metadata: {new_ids}")
-                                logger.info(f"✅ Verified {len(saved_ids)} total allocated transaction IDs saved to database")
-                            else:
-                                logger.warning(f"⚠️  Background task: connection_data is not a dict after update (type: {type(updated_connection.connection_data)})")
-                        else:
-                            logger.error(f"❌ Background task: CRITICAL - connection_data is None after update_connection!")
+                        saved_count = _save_allocated_ids(background_db, connection_id, new_ids)
+                        logger.info("Marked %d transaction IDs as allocated (%d new rows)", len(new_ids), saved_count)
                     else:
-                        logger.info(f"ℹ️  Background task: All {len(allocated_ids)} transaction IDs were already in allocated_transaction_ids list")
+                        logger.info("Background task: All %d transaction IDs were already allocated", len(allocated_ids))
                 else:
-                    logger.warning(f"⚠️  Background task: No transaction IDs found in new_income_transactions to mark as allocated")
+                    logger.warning("Background task: No transaction IDs found in new_income_transactions to mark as allocated")
             else:
-                logger.warning(f"⚠️  Background task: new_income_transactions is empty, cannot mark transaction IDs as allocated")
+                logger.warning("Background task: new_income_transactions is empty, cannot mark transaction IDs as allocated")
             
             # Update last_sync after allocation completes to reflect when allocation happened
             # This ensures next sync uses correct cutoff time
             if allocation_actions:
-                # CRITICAL: Expire ALL connection objects from the session to prevent SQLAlchemy
-                # from trying to save them with dict connection_data (which causes "can't adapt type 'dict'" error)
-                # get_connection_by_id parses connection_data to dict, and SQLAlchemy can't save dicts to String columns
-                from models import PaymentConnection
-                for obj in list(background_db.identity_map.values()):
-                    if isinstance(obj, PaymentConnection):
-                        background_db.expire(obj)
-                        logger.debug(f"Expired PaymentConnection object {obj.id} from session to prevent dict save error")
-                
                 # CRITICAL: Update last_sync directly via SQL to avoid stale session data
                 # Don't use get_connection_by_id as it might return stale connection_data
-                from sqlalchemy import text
                 from datetime import datetime, timezone
                 try:
                     background_db.execute(
@@ -1129,30 +1192,266 @@ def allocate_income_from_sync(user_id: UUID, connection_id: UUID, new_income_tra
                         }
                     )
                     background_db.commit()
-                    logger.debug(f"Updated connection last_sync after allocation (via direct SQL to avoid stale data)")
+                    logger.debug("Updated connection last_sync after allocation (via direct SQL to avoid stale data)")
                 except Exception as e:
-                    logger.error(f"Failed to update last_sync: {e}", exc_info=True)
+                    logger.error("Failed to update last_sync: %s", e, exc_info=True)
                     background_db.rollback()
         finally:
-            background_db.close()
-            logger.info(f"BACKGROUND TASK COMPLETED: Income allocation for connection {connection_id}")
+            BackgroundSessionLocal.remove()
+            logger.info("BACKGROUND TASK COMPLETED: Income allocation for connection %s", connection_id)
     except Exception as e:
-        logger.error(f"❌ ERROR in income allocation from sync {connection_id}: {e}", exc_info=True)
+        logger.error("ERROR in income allocation from sync %s: %s", connection_id, e, exc_info=True)
+
 
+def process_connection_after_sync(user_id: UUID, connection_id: UUID, connection_name: str, connection_created_at, connection_data: dict, previous_last_sync):
+    """Background task: scan a synced connection for new income and spending, send spending
+    notifications, then hand new income to allocate_income_from_sync.
+    connection_data is the dict the sync endpoint already parsed (read-only here).
+    """
+    logger.info("BACKGROUND TASK STARTED: Post-sync processing for connection %s for user %s", connection_id, user_id)
+    new_income_transactions = []
+    try:
+        from database import BackgroundSessionLocal
+            
+        background_db = BackgroundSessionLocal()
+        try:
+            user = get_user_by_id(background_db, str(user_id))
+            if not user:
+                logger.warning("User not found for post-sync processing: %s", user_id)
+                return
+            
+            # Check for new income transactions since last sync (or last 7 days if no previous sync)
+            # Handle both "transactions" (for UPI files) and "entries" (for cash_income.json)
+            transactions = []
+            
+            if connection_data:
+                logger.info(f"🔍 Connection data keys: {list(connection_data.keys())}")
+                if "transactions" in connection_data:
+                    transactions = connection_data.get("transactions", [])
+                    logger.info(f"📋 Found {len(transactions)} transactions in connection_data for '{connection_name}'")
+                    # Log first few transaction IDs to verify they're loaded
+                    if transactions:
+                        sample_ids = [t.get("id", "no-id")[:30] for t in transactions[:3] if isinstance(t, dict)]
+                        logger.info(f"📋 Sample transaction IDs: {sample_ids}")
+                elif "entries" in connection_data:
+                    # For cash_income.json, entries are income transactions
+                    entries = connection_data.get("entries", [])
+                    logger.info(f"📋 Found {len(entries)} entries in connection_data for '{connection_name}'")
+                    # Convert entries to transaction format for processing
+                    for entry in entries:
+                        if isinstance(entry, dict):
+                            # Convert entry to transaction-like format
+                            txn = {
+                                "type": "credit",  # All entries in cash_income are income
+                                "amount": entry.get("amount", 0),
+                                "description": entry.get("description", "Cash Income"),
+                                "timestamp": None,  # Will use date field
+                                "date": entry.get("date"),
+                                "id": entry.get("id", "")  # Preserve entry ID
+                            }
+                            transactions.append(txn)
+                    if transactions:
+                        sample_ids = [t.get("id", "no-id")[:30] for t in transactions[:3]]
+                        logger.info(f"📋 Sample entry IDs: {sample_ids}")
+                else:
+                    logger.warning(f"⚠️  Connection '{connection_name}' has no 'transactions' or 'entries' in connection_data")
+            else:
+                logger.warning(f"⚠️  Connection '{connection_name}' has no connection_data or it's not a dict")
+            
+            if not isinstance(transactions, list):
+                transactions = []
+                logger.warning(f"⚠️  Transactions is not a list, resetting to empty list")
+            
+            # Determine cutoff time: use previous_last_sync if available, otherwise connection creation time
+            today = get_ist_now()
+            
+            # Get connection creation time as the absolute minimum cutoff
+            # Transactions before connection was created should NEVER be allocated
+            connection_created_at = connection_created_at
+            if connection_created_at:
+                connection_created_at = to_ist(connection_created_at)
+            else:
+                # Fallback: if no created_at, use a very old date to be safe
+                connection_created_at = today - timedelta(days=365)
+            
+            if previous_last_sync:
+                previous_last_sync = to_ist(previous_last_sync)
+                # Use the later of: last_sync OR connection creation time
+                # This ensures we never allocate transactions from before connection was created
+                cutoff_time = max(previous_last_sync, connection_created_at)
+            else:
+                # If no previous sync, use connection creation time (not last 7 days)
+                # This prevents allocating old transactions when syncing for the first time
+                cutoff_time = connection_created_at
+            
+            logger.info(f"🕐 Cutoff time set to: {cutoff_time} (connection created: {connection_created_at}, last_sync: {previous_last_sync})")
+            
+            # Get the already-allocated transaction IDs (connection_allocated_txn survives sync and reconnect)
+            # This prevents double allocation even if last_sync is reset or transactions are re-added
+            allocated_txn_ids = _load_allocated_ids(background_db, connection_id)
+            logger.info(f"📋 Found {len(allocated_txn_ids)} previously allocated transaction IDs")
+            
+            new_income_transactions = []
+            
+            # Spending notifications cover new debit transactions since last sync (or last 7 days);
+            # they are collected in the same pass as income
+            expense_cutoff = previous_last_sync
+            if expense_cutoff:
+                if expense_cutoff.tzinfo is None:
+                    expense_cutoff = to_ist(expense_cutoff)
+                expense_cutoff = expense_cutoff - timedelta(minutes=5)
+            else:
+                expense_cutoff = today - timedelta(days=7)
+            new_expense_transactions = []
+            
+            logger.info(f"🔍 Processing {len(transactions)} transactions to find income (credit) transactions...")
+            credit_count = 0
+            total_checked = 0
+            # Per-transaction decisions are logged at DEBUG; these counters feed the INFO summary after the loop
+            skipped_allocated = 0
+            skipped_precreation = 0
+            skipped_cutoff = 0
+            # Date bounds as epoch seconds, computed once; each credit is compared via one timestamp() call
+            # (float seconds keep microsecond ordering exact for current dates, so "strictly after" still holds)
+            today_ts = today.timestamp()
+            cutoff_ts = cutoff_time.timestamp()
+            created_ts = connection_created_at.timestamp()
+            for txn in transactions:
+                if not isinstance(txn, dict):
+                    logger.debug("⏭️  Skipping non-dict transaction: %s", type(txn))
+                    continue
+            
+                txn_type = str(txn.get("type", "")).lower()
+                if txn_type == "debit":
+                    amount = float(txn.get("amount", 0))
+                    if amount <= 0:
+                        continue
+                    txn_date = _normalize_timestamp(txn.get("timestamp"))
+                    if txn_date and txn_date >= expense_cutoff:
+                        description = txn.get("description", f"Expense via {connection_name}")
+                        new_expense_transactions.append({
+                            "amount": amount,
+                            "date": txn_date,
+                            "description": description,
+                            "category": _format_spending_category(description),
+                        })
+                    continue
+            
+                # Check if it's an income transaction (credit)
+                if txn_type == "credit":
+                    credit_count += 1
+                    amount = float(txn.get("amount", 0))
+                    if amount > 0:
+                        total_checked += 1
+                    
+                        # FIRST CHECK: Skip if this transaction ID has already been allocated
+                        # This prevents double allocation even if sync is called multiple times.
+                        # Done before the date parse - most credits on a re-sync are already allocated
+                        txn_id = txn.get("id", "")
+                        if txn_id and txn_id in allocated_txn_ids:
+                            skipped_allocated += 1
+                            logger.debug("⏭️  Skipping transaction ₹%s (ID: %.30s...) - already allocated", amount, txn_id)
+                            continue
+                    
+                        # Check transaction date - handle both timestamp and date fields
+                        # This is critical for transactions added through admin panel (date is used by cash_income.json entries).
+                        # _normalize_timestamp handles "...Z"/offset/naive ISO strings, plain dates, epochs and datetimes
+                        txn_date = _normalize_timestamp(txn.get("timestamp") or txn.get("date"))
+                    
+                        # If no timestamp or date, use current time (for newly added transactions without timestamp)
+                        # This should rarely happen for admin-added transactions, but handle gracefully
+                        if not txn_date:
+                            logger.warning(f"Transaction {txn.get('id', 'unknown')} has no parseable timestamp or date ({txn.get('timestamp') or txn.get('date')!r}), using current time")
+                            txn_date = today
+                    
+                        # Get transaction ID to track which ones have been allocated
+                        # Admin panel always provides IDs (txn_recent_XXX or entry_recent_XXX)
+                        if not txn_id:
+                            logger.warning(f"Transaction missing ID - amount: ₹{amount}, date: {txn_date}, description: {txn.get('description', 'N/A')[:50]}")
+                            # Generate a stable ID for tracking if missing (shouldn't happen for admin-panel transactions)
+                            txn_id = f"auto_{txn_date.strftime('%Y%m%d')}_{int(amount)}_{hash(str(txn.get('description', ''))[:20]) % 10000}"
+                            if txn_id in allocated_txn_ids:
+                                skipped_allocated += 1
+                                logger.debug("⏭️  Skipping transaction ₹%s (ID: %.30s...) from %s - already allocated", amount, txn_id, txn_date)
+                                continue
+                    
+                        # SECOND CHECK: Only allocate transactions that are:
+                        # 1. After the cutoff time (connection creation OR last sync, whichever is later)
+                        # 2. OR in the future (scheduled transactions)
+                        # CRITICAL: Never allocate transactions from before connection was created
+                        txn_ts = txn_date.timestamp()
+                        is_future_date = txn_ts > today_ts
+                        is_after_cutoff = txn_ts > cutoff_ts  # Strictly after cutoff (not equal)
+                        is_after_connection_creation = txn_ts > created_ts  # Additional safety check
+                    
+                        # Include transaction ONLY if:
+                        # - It's in the future (scheduled), OR
+                        # - It's after cutoff AND after connection creation (double safety check)
+                        # Removed "admin panel transaction" special case - date is the only criteria
+                        if is_future_date or (is_after_cutoff and is_after_connection_creation):
+                            new_income_transactions.append(IncomeTxn(
+                                amount=amount,
+                                date=txn_date,
+                                description=txn.get("description", "Income from connection"),
+                                id=txn_id  # Store ID for tracking
+                            ))
+                            if is_future_date:
+                                reason = "future date"
+                            else:
+                                reason = "after cutoff"
+                            logger.debug("✅ Including NEW transaction ₹%s (ID: %.30s...) from %s (reason: %s, cutoff: %s, connection_created: %s)", amount, txn_id, txn_date, reason, cutoff_time, connection_created_at)
+                        else:
+                            if not is_after_connection_creation:
+                                skipped_precreation += 1
+                                logger.debug("⏭️  Skipping transaction ₹%s (ID: %.30s...) from %s - BEFORE connection creation at %s", amount, txn_id, txn_date, connection_created_at)
+                            else:
+                                skipped_cutoff += 1
+                                logger.debug("⏭️  Skipping transaction ₹%s (ID: %.30s...) from %s (before cutoff %s, not future)", amount, txn_id, txn_date, cutoff_time)
+            
+            # Log summary of transaction processing
+            logger.info(f"📊 Found {credit_count} credit transactions out of {len(transactions)} total transactions")
+            skipped_count = total_checked - len(new_income_transactions)
+            logger.info(f"📊 Transaction Processing Summary: Checked {total_checked} income transactions (amount > 0), {len(new_income_transactions)} NEW (will allocate), {skipped_count} skipped ({skipped_allocated} already allocated, {skipped_precreation} before connection creation, {skipped_cutoff} before cutoff)")
+            
+            if total_checked == 0 and len(transactions) > 0:
+                # Debug: Show what types of transactions we have
+                transaction_types = {}
+                for txn in transactions:
+                    if isinstance(txn, dict):
+                        txn_type = txn.get("type", "unknown")
+                        transaction_types[txn_type] = transaction_types.get(txn_type, 0) + 1
+                logger.warning(f"⚠️  No credit transactions found! Transaction types in data: {transaction_types}")
+            
+            # Spending transactions since last sync were collected in the scan above
+            if new_expense_transactions:
+                logger.info(f"Sending {len(new_expense_transactions)} spending notifications from connection '{connection_name}' after sync")
+                notify_connection_spending(background_db, user, new_expense_transactions)
+        finally:
+            BackgroundSessionLocal.remove()
+    except Exception as e:
+        # Don't let a bad transaction feed take down the worker
+        logger.error("ERROR in post-sync processing for connection %s: %s", connection_id, e, exc_info=True)
+        return
+    
+    # Allocation opens its own scoped session, so it runs after ours has been removed
+    if new_income_transactions:
+        total_new_income = sum(t.amount for t in new_income_transactions)
+        transaction_details = ", ".join([f"₹{t.amount}" for t in new_income_transactions])
+        logger.info(f"💰 Found ₹{total_new_income} new income from connection '{connection_name}' ({transaction_details}). Allocating...")
+        allocate_income_from_sync(user_id, connection_id, new_income_transactions, previous_last_sync)
 
 def allocate_income_from_new_connection(user_id: UUID, connection_id: UUID):
     """Background task to allocate income from a newly added connection"""
     logger.info(f"BACKGROUND TASK STARTED: Allocating income from new connection {connection_id} for user {user_id}")
     try:
-        from database import SessionLocal
+        from database import BackgroundSessionLocal
         from crud import get_user_connections, get_user_by_id
         from routers.coach import get_real_user_data
         from services.agentic_ai import ToolRegistry, ToolType
         from services.ai_coach import emergency_fund_agent, determine_allocation_percentages
         from datetime import datetime, timedelta, timezone
-        import json
         
-        background_db = SessionLocal()
+        background_db = BackgroundSessionLocal()
         try:
             user = get_user_by_id(background_db, str(user_id))
             if not user:
@@ -1167,19 +1466,8 @@ def allocate_income_from_new_connection(user_id: UUID, connection_id: UUID):
                 logger.warning(f"Connection {connection_id} not found for income allocation")
                 return
             
-            # Parse connection data
-            connection_data = connection.connection_data
-            if connection_data is None:
-                connection_data = {}
-            elif isinstance(connection_data, str):
-                try:
-                    connection_data = json.loads(connection_data)
-                except:
-                    connection_data = {}
-            
-            # Ensure connection_data is a dict
-            if not isinstance(connection_data, dict):
-                    connection_data = {}
+            # Parse connection data once; it is a dict for the rest of the task
+            connection_data = _ensure_dict(connection.connection_data)
             
             # Check for income transactions in the last 7 days
             if connection_data and "transactions" in connection_data:
@@ -1201,57 +1489,17 @@ def allocate_income_from_new_connection(user_id: UUID, connection_id: UUID):
                         connection_created_at = get_ist_now()
                 
                 # Only allocate income from transactions AFTER connection was created
-                # This ensures we don't re-allocate income when reconnecting
-                new_income_transactions = []
-                
-                for txn in transactions:
-                    if not isinstance(txn, dict):
-                        continue
-                            
-                    # Check if it's an income transaction (credit)
-                    if txn.get("type", "").lower() == "credit":
-                        amount = float(txn.get("amount", 0))
-                        if amount > 0:
-                            # Check transaction date
-                            txn_date = None
-                            if txn.get("timestamp"):
-                                try:
-                                    if isinstance(txn["timestamp"], str):
-                                        # Parse timestamp and ensure it's timezone-aware
-                                        txn_date_str = txn["timestamp"].replace("Z", "+00:00")
-                                        txn_date = datetime.fromisoformat(txn_date_str)
-                                        # If timezone-naive, assume UTC then convert to IST
-                                        if txn_date.tzinfo is None:
-                                            txn_date = txn_date.replace(tzinfo=timezone.utc)
-                                        txn_date = to_ist(txn_date)
-                                    else:
-                                        txn_date = txn["timestamp"]
-                                        # If timezone-naive, assume UTC then convert to IST
-                                        if isinstance(txn_date, datetime):
-                                            if txn_date.tzinfo is None:
-                                                txn_date = txn_date.replace(tzinfo=timezone.utc)
-                                            txn_date = to_ist(txn_date)
-                                except Exception as e:
-                                    logger.warning(f"Error parsing transaction timestamp: {e}")
-                                    pass
-                            
-                            # Only allocate income from transactions that occurred AFTER connection was created
-                            # This prevents double allocation when disconnecting and reconnecting
-                            if txn_date and txn_date >= connection_created_at:
-                                txn_id = txn.get("id", "")
-                                new_income_transactions.append({
-                                    "amount": amount,
-                                    "date": txn_date,
-                                    "description": txn.get("description", "Income from connection"),
-                                    "id": txn_id  # Store ID for tracking
-                                })
-                                logger.debug(f"Including transaction ₹{amount} (ID: {txn_id}) from {txn_date} (after connection created at {connection_created_at})")
-                            else:
-                                logger.debug(f"Skipping transaction ₹{amount} from {txn_date} (before connection created at {connection_created_at})")
+                # This ensures we don't re-allocate income when reconnecting.
+                # Spending notifications cover debits around connection creation (last 12 hours);
+                # both lists are collected in a single scan
+                expense_window_start = connection_created_at - timedelta(hours=12)
+                new_income_transactions, new_expense_transactions = _classify_new_connection_transactions(
+                    transactions, connection_created_at, expense_window_start, connection.name
+                )
                 
                 # If we found new income (transactions after connection creation), allocate it
                 if new_income_transactions:
-                    total_new_income = sum(t["amount"] for t in new_income_transactions)
+                    total_new_income = sum(t.amount for t in new_income_transactions)
                     logger.info(f"Found ₹{total_new_income} new income from connection '{connection.name}' (transactions after {connection_created_at}). Triggering allocation...")
                     
                     # Initialize tool registry (Agentic AI tools)
@@ -1269,6 +1517,7 @@ def allocate_income_from_new_connection(user_id: UUID, connection_id: UUID):
                     if goals_result.get("success") and goals_result.get("goals"):
                         goals = goals_result["goals"]
                         active_goals = [g for g in goals if not g.get("is_completed", False)]
+                        goal_by_id = {str(g.get("id")): g for g in active_goals}
                         
                         if active_goals:
                             # Calculate recent expenses for context
@@ -1309,6 +1558,10 @@ def allocate_income_from_new_connection(user_id: UUID, connection_id: UUID):
                             
                             allocation_actions = []
                             
+                            # Collect allocations and apply them together below
+                            allocation_requests = []
+                            allocation_labels = {}
+                            
                             # Allocate to Emergency Fund
                             emergency_goals = [g for g in active_goals if g.get("type") == "emergency"]
                             emergency_fund_allocation_info = allocation_plan.get("emergency_fund", {})
@@ -1322,40 +1575,44 @@ def allocate_income_from_new_connection(user_id: UUID, connection_id: UUID):
                                     emergency_allocation = emergency_fund_allocation_info.get("amount", 0)
                                     emergency_allocation = min(emergency_remaining, emergency_allocation)
                                     if emergency_allocation > 0:
-                                        result = tool_registry.execute_tool(
-                                            ToolType.ALLOCATE_TO_GOAL,
-                                            {"goal_id": emergency_goal["id"], "amount": emergency_allocation},
-                                            "new_connection_allocation"
-                                        )
-                                        if result.get("success"):
-                                            allocation_actions.append(result)
-                                            logger.info(f"Auto-allocated ₹{emergency_allocation} ({emergency_fund_allocation_info.get('percent', 0)}%) to Emergency Fund from new connection income (LLM-determined)")
+                                        allocation_requests.append({"goal_id": emergency_goal["id"], "amount": emergency_allocation})
+                                        allocation_labels[str(emergency_goal["id"])] = ("Emergency Fund", emergency_fund_allocation_info.get('percent', 0))
                             
                             # Allocate to regular goals
                             goal_allocations = allocation_plan.get("goal_allocations", [])
                             regular_goals = [g for g in active_goals if g.get("type") != "emergency"]
                             
-                            for goal_alloc in goal_allocations:
+                            # Index goals once: exact id and 8-char UUID prefix (unique prefixes only)
+                            regular_by_id = {str(g["id"]): g for g in regular_goals}
+                            regular_by_prefix = {}
+                            ambiguous_prefixes = set()
+                            for goal_id_str, goal in regular_by_id.items():
+                                prefix = goal_id_str[:8]
+                                if prefix in regular_by_prefix:
+                                    ambiguous_prefixes.add(prefix)
+                                regular_by_prefix[prefix] = goal
+                            for prefix in ambiguous_prefixes:
+                                del regular_by_prefix[prefix]
+                            
+                            for goal_index, goal_alloc in enumerate(goal_allocations):
                                 goal_id_from_llm = goal_alloc.get("goal_id")
                                 goal_amount = goal_alloc.get("amount", 0)
                                 
                                 if goal_id_from_llm and goal_amount > 0:
+                                    goal_id_from_llm = str(goal_id_from_llm)
                                     # Try exact match first
-                                    matching_goal = next((g for g in regular_goals if str(g.get("id")) == str(goal_id_from_llm)), None)
+                                    matching_goal = regular_by_id.get(goal_id_from_llm)
                                     
                                     # If no exact match, try to find by partial match (handles LLM typos)
                                     if not matching_goal:
                                         # Try matching first 8 characters (UUID prefix)
-                                        goal_id_prefix = str(goal_id_from_llm)[:8] if len(str(goal_id_from_llm)) >= 8 else str(goal_id_from_llm)
-                                        potential_matches = [g for g in regular_goals if str(g.get("id", ""))[:8] == goal_id_prefix]
-                                        if len(potential_matches) == 1:
-                                            matching_goal = potential_matches[0]
+                                        matching_goal = regular_by_prefix.get(goal_id_from_llm[:8])
+                                        if matching_goal:
                                             logger.warning(f"LLM goal_id '{goal_id_from_llm}' didn't match exactly, but found match by prefix: '{matching_goal.get('id')}' for goal '{matching_goal.get('name')}'")
                                     
                                     # If still no match, try to match by goal order (fallback)
                                     if not matching_goal and regular_goals:
                                         # Use goal order from LLM response as fallback
-                                        goal_index = goal_allocations.index(goal_alloc)
                                         if goal_index < len(regular_goals):
                                             matching_goal = regular_goals[goal_index]
                                             logger.warning(f"LLM goal_id '{goal_id_from_llm}' didn't match any goal, using goal order fallback: '{matching_goal.get('name')}' (ID: {matching_goal.get('id')})")
@@ -1372,20 +1629,29 @@ def allocate_income_from_new_connection(user_id: UUID, connection_id: UUID):
                                         if goal_remaining > 0:
                                             goal_allocation = min(goal_remaining, goal_amount)
                                             if goal_allocation > 0:
-                                                result = tool_registry.execute_tool(
-                                                    ToolType.ALLOCATE_TO_GOAL,
-                                                    {"goal_id": matching_goal["id"], "amount": goal_allocation},
-                                                    "new_connection_allocation"
-                                                )
-                                                if result.get("success"):
-                                                    allocation_actions.append(result)
-                                                    logger.info(f"Auto-allocated ₹{goal_allocation} ({goal_alloc.get('percent', 0)}%) to goal '{matching_goal['name']}' from new connection income (LLM-determined)")
-                                                else:
-                                                    logger.error(f"Failed to allocate ₹{goal_allocation} to goal '{matching_goal.get('name')}': {result.get('error', 'Unknown error')}")
+                                                allocation_requests.append({"goal_id": matching_goal["id"], "amount": goal_allocation})
+                                                allocation_labels[str(matching_goal["id"])] = (f"goal '{matching_goal.get('name')}'", goal_alloc.get('percent', 0))
                                         else:
                                             logger.warning(f"Goal '{matching_goal.get('name')}' is already completed (remaining: ₹{goal_remaining}), skipping allocation")
                                     else:
-                                        logger.warning(f"Could not find matching goal for LLM goal_id '{goal_id_from_llm}'. Available goal IDs: {[str(g.get('id')) for g in regular_goals]}")
+                                        logger.warning(f"Could not find matching goal for LLM goal_id '{goal_id_from_llm}'. Available goal IDs: {list(regular_by_id)}")
+                            
+                            # Apply every allocation in a single SELECT + commit
+                            if allocation_requests:
+                                batch_result = tool_registry.execute_tool(
+                                    ToolType.ALLOCATE_BATCH,
+                                    {"allocations": allocation_requests},
+                                    "new_connection_allocation"
+                                )
+                                if not batch_result.get("success"):
+                                    logger.error(f"Failed to apply batched allocations from new connection: {batch_result.get('error', 'Unknown error')}")
+                                for result in batch_result.get("results", []):
+                                    label, percent = allocation_labels.get(result.get("goal_id"), ("goal", 0))
+                                    if result.get("success"):
+                                        allocation_actions.append(result)
+                                        logger.info(f"Auto-allocated ₹{result.get('allocated')} ({percent}%) to {label} from new connection income (LLM-determined)")
+                                    else:
+                                        logger.error(f"Failed to allocate to {label}: {result.get('error', 'Unknown error')}")
                             
                             if allocation_actions:
                                 total_allocated = sum(a.get("allocated", 0) for a in allocation_actions)
@@ -1393,30 +1659,19 @@ def allocate_income_from_new_connection(user_id: UUID, connection_id: UUID):
                                 logger.info(f"✅ Successfully allocated ₹{total_allocated} ({(total_allocated/total_new_income*100):.1f}%) from ₹{total_new_income} new connection income to {len(allocation_actions)} goals using LLM-determined percentages. User has ₹{remaining_for_user} ({(remaining_for_user/total_new_income*100):.1f}%) remaining.")
                                 
                                 # Update savings streak (non-blocking)
-                                try:
-                                    from services.streak_service import update_savings_streak
-                                    streak_result = update_savings_streak(background_db, str(user_id), total_allocated)
-                                    if streak_result.get("current_streak", 0) > 0:
-                                        logger.info(f"Savings streak updated: {streak_result.get('message', '')}")
-                                except Exception as streak_error:
-                                    logger.warning(f"Failed to update savings streak: {streak_error}")
+                                _post_alloc_pool.submit(_update_savings_streak_job, str(user_id), total_allocated)
                                 
                                 # Prepare allocation details for email
-                                from email_service import send_income_allocation_email
+                                from email_service import send_income_allocation_email, queue_email
                                 email_allocations = []
                                 for action in allocation_actions:
-                                    goal_id = action.get("goal_id")
                                     allocated_amount = action.get("allocated", 0)
                                     percent = (allocated_amount / total_new_income * 100) if total_new_income > 0 else 0
                                     
                                     # Get goal details
-                                    goal_name = "Unknown Goal"
-                                    goal_type = "savings"
-                                    for goal in active_goals:
-                                        if str(goal.get("id")) == str(goal_id):
-                                            goal_name = goal.get("name", "Unknown Goal")
-                                            goal_type = goal.get("type", "savings")
-                                            break
+                                    goal = goal_by_id.get(str(action.get("goal_id")))
+                                    goal_name = goal.get("name", "Unknown Goal") if goal else "Unknown Goal"
+                                    goal_type = goal.get("type", "savings") if goal else "savings"
                                     
                                     email_allocations.append({
                                         "goal_name": goal_name,
@@ -1425,13 +1680,14 @@ def allocate_income_from_new_connection(user_id: UUID, connection_id: UUID):
                                         "goal_type": goal_type
                                     })
                                 
-                                # Send email notification
+                                # Send email notification on the email pool so SMTP doesn't hold the DB session
                                 try:
                                     user_name = f"{user.first_name or ''} {user.last_name or ''}".strip() or user.email.split('@')[0]
                                     # Use CURRENT date/time for email (not transaction date)
                                     # This shows when the allocation happened, not when transactions occurred
                                     current_date = get_ist_now()
-                                    send_income_allocation_email(
+                                    queue_email(
+                                        send_income_allocation_email,
                                         email=user.email,
                                         user_name=user_name,
                                         income_amount=total_new_income,
@@ -1444,40 +1700,15 @@ def allocate_income_from_new_connection(user_id: UUID, connection_id: UUID):
                                 except Exception as email_error:
                                     logger.error(f"Failed to send income allocation email: {email_error}", exc_info=True)
                                 
-                                # Mark these transactions as allocated by storing their IDs in connection metadata
+                                # Mark these transactions as allocated by recording their IDs in connection_allocated_txn
                                 if allocation_actions and new_income_transactions:
                                     # Get transaction IDs that were just allocated
-                                    allocated_ids = [t.get("id") for t in new_income_transactions if t.get("id")]
+                                    allocated_ids = [t.id for t in new_income_transactions if t.id]
                                     
                                     if allocated_ids:
-                                        # Ensure connection_data exists and is a dict
-                                        if connection_data is None:
-                                            connection_data = {}
-                                        elif isinstance(connection_data, str):
-                                            try:
-                                                connection_data = json.loads(connection_data)
-                                            except:
-                                                connection_data = {}
-                                        
-                                        if not isinstance(connection_data, dict):
-                                            connection_data = {}
-                                        
-                                        # Initialize allocated_transaction_ids if it doesn't exist
-                                        if "allocated_transaction_ids" not in connection_data:
-                                            connection_data["allocated_transaction_ids"] = []
-                                        
-                                        # Add new IDs (avoid duplicates)
-                                        existing_allocated = set(connection_data["allocated_transaction_ids"])
-                                        new_ids = [tid for tid in allocated_ids if tid and tid not in existing_allocated]
-                                        connection_data["allocated_transaction_ids"].extend(new_ids)
-                                        
-                                        # Save updated connection_data back to database
-                                        from schemas import ConnectionUpdate
-                                        from crud import update_connection
-                                        connection_update = ConnectionUpdate(connection_data=connection_data)
-                                        update_connection(background_db, connection_id, user_id, connection_update)
-                                        
-                                        logger.info(f"✅ Marked {len(new_ids)} transaction IDs as allocated in connection metadata: {new_ids}")
+                                        # Duplicates are dropped by ON CONFLICT DO NOTHING
+                                        saved_count = _save_allocated_ids(background_db, connection_id, allocated_ids)
+                                        logger.info(f"✅ Marked {len(allocated_ids)} transaction IDs as allocated ({saved_count} new rows): {allocated_ids}")
                             else:
                                 logger.info(f"No allocation made - goals may be completed or no active goals found")
                         else:
@@ -1487,37 +1718,14 @@ def allocate_income_from_new_connection(user_id: UUID, connection_id: UUID):
                 else:
                     logger.info(f"No new income (transactions after connection creation at {connection_created_at}) found in connection '{connection.name}' - skipping allocation")
                 
-                # Detect new spending transactions around connection creation (last 12 hours)
-                expense_window_start = connection_created_at - timedelta(hours=12)
-                new_expense_transactions = []
-                for txn in transactions:
-                    if not isinstance(txn, dict):
-                        continue
-                    if str(txn.get("type", "")).lower() != "debit":
-                        continue
-                    amount = float(txn.get("amount", 0))
-                    if amount <= 0:
-                        continue
-                    txn_date = None
-                    if txn.get("timestamp"):
-                        txn_date = _normalize_timestamp(txn.get("timestamp"))
-                    if txn_date and txn_date >= expense_window_start:
-                        description = txn.get("description", f"Expense via {connection.name}")
-                        category = _format_spending_category(description)
-                        new_expense_transactions.append({
-                            "amount": amount,
-                            "date": txn_date,
-                            "description": description,
-                            "category": category,
-                        })
-                
+                # Spending transactions around connection creation were collected in the scan above
                 if new_expense_transactions:
                     logger.info(f"Sending {len(new_expense_transactions)} spending notifications from connection '{connection.name}'")
                     notify_connection_spending(background_db, user, new_expense_transactions)
             else:
                 logger.info(f"No transaction data found in new connection '{connection.name}' - skipping allocation")
         finally:
-            background_db.close()
+            BackgroundSessionLocal.remove()
             logger.info(f"BACKGROUND TASK COMPLETED: Income allocation for connection {connection_id}")
     except Exception as e:
         logger.error(f"❌ ERROR in income allocation from new connection {connection_id}: {e}", exc_info=True)
@@ -1534,7 +1742,7 @@ def connect_payment_gateway(
     mock_data = load_mock_data(connection.name)
     
     # Merge mock data with provided connection_data
-    # Note: create_connection will handle preserving allocated_transaction_ids if reconnecting
+    # Note: create_connection reuses the existing row when reconnecting, so its allocated IDs are kept
     if connection.connection_data:
         connection.connection_data = {**mock_data, **connection.connection_data}
     else:
@@ -1585,403 +1793,32 @@ def sync_payment_gateway(
         )
     previous_last_sync = existing_connection.last_sync
     
-    # IMPORTANT: Get allocated_transaction_ids BEFORE syncing
-    # This prevents losing them if connection_data is None
-    existing_allocated_ids = set()
-    if existing_connection.connection_data:
-        try:
-            import json
-            if isinstance(existing_connection.connection_data, str):
-                existing_conn_data = json.loads(existing_connection.connection_data)
-            else:
-                existing_conn_data = existing_connection.connection_data
-            if isinstance(existing_conn_data, dict):
-                existing_allocated_ids = set(existing_conn_data.get("allocated_transaction_ids", []))
-                logger.info(f"📋 Preserved {len(existing_allocated_ids)} allocated transaction IDs before sync")
-        except:
-            pass
-    
     connection = sync_connection(db, connection_id, user_id)
     
-    # IMPORTANT: Refresh connection to ensure we have the latest data from database
-    # sync_connection might have updated connection_data, so we need fresh data
-    db.refresh(connection)
+    # sync_connection has already committed, refreshed and parsed connection_data - no second refresh round-trip.
+    # Record the parsed dict as the committed value so a later commit never tries to write it to the String column
+    set_committed_value(connection, "connection_data", connection.connection_data)
     
-    # After syncing, check for new income transactions and allocate them
-    try:
-        from services.agentic_ai import ToolRegistry, ToolType
-        from routers.coach import get_real_user_data
-        from services.ai_coach import emergency_fund_agent
-        from datetime import datetime, timedelta, timezone
-        
-        # Get user
-        user = get_user_by_id(db, str(user_id))
-        if not user:
-            logger.warning(f"User not found for allocation: {user_id}")
-            return connection
-        
-        # Parse connection data
-        # IMPORTANT: After sync_connection, connection_data might be a string (JSON) or dict
-        # We need to handle both cases because SQLAlchemy returns stored value (JSON string) from DB
-        connection_data_raw = connection.connection_data
-        logger.info(f"🔍 Raw connection_data type after sync: {type(connection_data_raw)}, is None: {connection_data_raw is None}")
-        
-        if connection_data_raw is None:
-            logger.warning(f"⚠️  Connection '{connection.name}' has connection_data = None after sync")
-            connection_data = {}
-        elif isinstance(connection_data_raw, str):
-            import json
-            try:
-                connection_data = json.loads(connection_data_raw)
-                logger.info(f"✅ Parsed connection_data from JSON string for '{connection.name}' (length: {len(connection_data_raw)} chars)")
-                logger.info(f"✅ Parsed dict has keys: {list(connection_data.keys()) if isinstance(connection_data, dict) else 'NOT A DICT'}")
-            except Exception as e:
-                logger.error(f"❌ Failed to parse connection_data JSON for '{connection.name}': {e}")
-                logger.error(f"❌ JSON string preview: {connection_data_raw[:200] if connection_data_raw else 'None'}...")
-                connection_data = {}
-        elif isinstance(connection_data_raw, dict):
-            logger.info(f"✅ connection_data is already a dict for '{connection.name}' with keys: {list(connection_data_raw.keys())}")
-            connection_data = connection_data_raw
-        else:
-            logger.warning(f"⚠️  Connection '{connection.name}' has connection_data of unexpected type: {type(connection_data_raw)}")
-            connection_data = {}
-        
-        # Ensure connection_data is a dict
-        if not isinstance(connection_data, dict):
-            logger.error(f"❌ connection_data is not a dict after parsing for '{connection.name}', resetting to empty dict")
-            logger.error(f"❌ Final connection_data type: {type(connection_data)}, value: {str(connection_data)[:200]}")
-            connection_data = {}
-        
-        # Restore allocated_transaction_ids if they were lost during sync
-        # But make sure we don't overwrite transactions that were just loaded
-        if existing_allocated_ids:
-            # Check if allocated_transaction_ids exist in connection_data
-            current_allocated = set(connection_data.get("allocated_transaction_ids", []))
-            # Merge with preserved IDs to ensure we have all of them
-            merged_allocated_ids = existing_allocated_ids.union(current_allocated)
-            
-            if len(merged_allocated_ids) > len(current_allocated):
-                # We have more IDs to restore, update connection_data
-                connection_data["allocated_transaction_ids"] = list(merged_allocated_ids)
-                logger.info(f"🔄 Restored {len(merged_allocated_ids)} allocated transaction IDs after sync (had {len(current_allocated)}, preserved {len(existing_allocated_ids)})")
-                # IMPORTANT: Preserve connection_data before update_connection
-                # because update_connection might lose it
-                preserved_connection_data = connection_data.copy()
-                # Save it back
-                from schemas import ConnectionUpdate
-                connection_update = ConnectionUpdate(connection_data=connection_data)
-                update_connection(db, connection_id, user_id, connection_update)
-                # Use preserved data instead of re-fetching (which might return None)
-                connection_data = preserved_connection_data
-                logger.info(f"🔄 After update_connection: Using preserved connection_data, keys: {list(connection_data.keys())}")
-            else:
-                logger.info(f"🔄 Allocated transaction IDs already present: {len(current_allocated)} IDs in connection_data")
-        
-        # Check for new income transactions since last sync (or last 7 days if no previous sync)
-        # Handle both "transactions" (for UPI files) and "entries" (for cash_income.json)
-        transactions = []
-        
-        # CRITICAL: Ensure connection_data is a dict before processing
-        # After update_connection, it might have been reset, so re-parse if needed
-        if not isinstance(connection_data, dict):
-            logger.warning(f"⚠️  connection_data is not a dict before processing, attempting to re-parse...")
-            # Try to get fresh data from connection object
-            if connection and connection.connection_data:
-                if isinstance(connection.connection_data, str):
-                    import json
-                    try:
-                        connection_data = json.loads(connection.connection_data)
-                        logger.info(f"✅ Re-parsed connection_data from connection object, keys: {list(connection_data.keys())}")
-                    except Exception as e:
-                        logger.error(f"❌ Failed to re-parse connection_data: {e}")
-                        connection_data = {}
-                elif isinstance(connection.connection_data, dict):
-                    connection_data = connection.connection_data
-                    logger.info(f"✅ Got connection_data from connection object, keys: {list(connection_data.keys())}")
-                else:
-                    connection_data = {}
-            else:
-                connection_data = {}
-        
-        # Log what we have before processing
-        logger.info(f"🔍 connection_data type: {type(connection_data)}, is None: {connection_data is None}, is dict: {isinstance(connection_data, dict)}")
-        logger.info(f"🔍 connection_data truthy check: {bool(connection_data)}, len if dict: {len(connection_data) if isinstance(connection_data, dict) else 'N/A'}")
-        if isinstance(connection_data, dict) and connection_data:
-            logger.info(f"🔍 connection_data keys: {list(connection_data.keys())}")
-        
-        if connection_data and isinstance(connection_data, dict):
-            logger.info(f"🔍 Connection data keys: {list(connection_data.keys())}")
-            if "transactions" in connection_data:
-                transactions = connection_data.get("transactions", [])
-                logger.info(f"📋 Found {len(transactions)} transactions in connection_data for '{connection.name}'")
-                # Log first few transaction IDs to verify they're loaded
-                if transactions:
-                    sample_ids = [t.get("id", "no-id")[:30] for t in transactions[:3] if isinstance(t, dict)]
-                    logger.info(f"📋 Sample transaction IDs: {sample_ids}")
-            elif "entries" in connection_data:
-                # For cash_income.json, entries are income transactions
-                entries = connection_data.get("entries", [])
-                logger.info(f"📋 Found {len(entries)} entries in connection_data for '{connection.name}'")
-                # Convert entries to transaction format for processing
-                for entry in entries:
-                    if isinstance(entry, dict):
-                        # Convert entry to transaction-like format
-                        txn = {
-                            "type": "credit",  # All entries in cash_income are income
-                            "amount": entry.get("amount", 0),
-                            "description": entry.get("description", "Cash Income"),
-                            "timestamp": None,  # Will use date field
-                            "date": entry.get("date"),
-                            "id": entry.get("id", "")  # Preserve entry ID
-                        }
-                        transactions.append(txn)
-                if transactions:
-                    sample_ids = [t.get("id", "no-id")[:30] for t in transactions[:3]]
-                    logger.info(f"📋 Sample entry IDs: {sample_ids}")
-            else:
-                logger.warning(f"⚠️  Connection '{connection.name}' has no 'transactions' or 'entries' in connection_data")
-        else:
-            logger.warning(f"⚠️  Connection '{connection.name}' has no connection_data or it's not a dict")
-        
-        if not isinstance(transactions, list):
-            transactions = []
-            logger.warning(f"⚠️  Transactions is not a list, resetting to empty list")
-        
-        # Determine cutoff time: use previous_last_sync if available, otherwise connection creation time
-        today = get_ist_now()
-        
-        # Get connection creation time as the absolute minimum cutoff
-        # Transactions before connection was created should NEVER be allocated
-        connection_created_at = connection.created_at
-        if connection_created_at:
-            connection_created_at = to_ist(connection_created_at)
-        else:
-            # Fallback: if no created_at, use a very old date to be safe
-            connection_created_at = today - timedelta(days=365)
-        
-        if previous_last_sync:
-            previous_last_sync = to_ist(previous_last_sync)
-            # Use the later of: last_sync OR connection creation time
-            # This ensures we never allocate transactions from before connection was created
-            cutoff_time = max(previous_last_sync, connection_created_at)
-        else:
-            # If no previous sync, use connection creation time (not last 7 days)
-            # This prevents allocating old transactions when syncing for the first time
-            cutoff_time = connection_created_at
-        
-        logger.info(f"🕐 Cutoff time set to: {cutoff_time} (connection created: {connection_created_at}, last_sync: {previous_last_sync})")
-        
-        # Get list of already-allocated transaction IDs from connection metadata
-        # This prevents double allocation even if last_sync is reset or transactions are re-added
-        # Also merge with preserved IDs from before sync
-        allocated_txn_ids = existing_allocated_ids.copy() if 'existing_allocated_ids' in locals() else set()
-        if connection_data and isinstance(connection_data, dict):
-            allocated_txn_ids.update(connection_data.get("allocated_transaction_ids", []))
-        logger.info(f"📋 Found {len(allocated_txn_ids)} previously allocated transaction IDs in connection metadata")
-        
-        new_income_transactions = []
-        
-        logger.info(f"🔍 Processing {len(transactions)} transactions to find income (credit) transactions...")
-        credit_count = 0
-        for txn in transactions:
-            if not isinstance(txn, dict):
-                logger.debug(f"⏭️  Skipping non-dict transaction: {type(txn)}")
-                continue
-            
-            # Check if it's an income transaction (credit)
-            txn_type = txn.get("type", "").lower()
-            if txn_type == "credit":
-                credit_count += 1
-                amount = float(txn.get("amount", 0))
-                if amount > 0:
-                    # Check transaction date - handle both timestamp and date fields
-                    # This is critical for transactions added through admin panel
-                    txn_date = None
-                    if txn.get("timestamp"):
-                        try:
-                            if isinstance(txn["timestamp"], str):
-                                # Parse timestamp and ensure it's timezone-aware
-                                # Handle both ISO format with Z and without
-                                txn_date_str = txn["timestamp"].replace("Z", "+00:00")
-                                if "+" not in txn_date_str and txn_date_str.count(":") == 2:
-                                    # If no timezone info, assume UTC
-                                    txn_date_str += "+00:00"
-                                txn_date = datetime.fromisoformat(txn_date_str)
-                                # If timezone-naive, assume UTC then convert to IST
-                                if txn_date.tzinfo is None:
-                                    txn_date = txn_date.replace(tzinfo=timezone.utc)
-                                txn_date = to_ist(txn_date)
-                            else:
-                                txn_date = txn["timestamp"]
-                                # If timezone-naive, assume UTC then convert to IST
-                                if isinstance(txn_date, datetime):
-                                    if txn_date.tzinfo is None:
-                                        txn_date = txn_date.replace(tzinfo=timezone.utc)
-                                    txn_date = to_ist(txn_date)
-                        except Exception as e:
-                            logger.warning(f"Error parsing transaction timestamp '{txn.get('timestamp')}': {e}")
-                            pass
-                    elif txn.get("date"):
-                        # Handle date field (for cash_income.json entries)
-                        try:
-                            date_str = txn["date"]
-                            if isinstance(date_str, str):
-                                # Parse date string (format: YYYY-MM-DD)
-                                # Try parsing as date first, then add time if needed
-                                if "T" in date_str or " " in date_str:
-                                    # Has time component
-                                    txn_date = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-                                else:
-                                    # Just date, set to start of day
-                                    txn_date = datetime.fromisoformat(date_str)
-                                # Convert to IST
-                                if txn_date.tzinfo is None:
-                                    txn_date = txn_date.replace(tzinfo=timezone.utc)
-                                txn_date = to_ist(txn_date)
-                            elif isinstance(date_str, datetime):
-                                txn_date = to_ist(date_str)
-                        except Exception as e:
-                            logger.warning(f"Error parsing transaction date '{txn.get('date')}': {e}")
-                            pass
-                    
-                    # If no timestamp or date, use current time (for newly added transactions without timestamp)
-                    # This should rarely happen for admin-added transactions, but handle gracefully
-                    if not txn_date:
-                        logger.warning(f"Transaction {txn.get('id', 'unknown')} has no timestamp or date, using current time")
-                        txn_date = today
-                    
-                    # Get transaction ID to track which ones have been allocated
-                    # Admin panel always provides IDs (txn_recent_XXX or entry_recent_XXX)
-                    txn_id = txn.get("id", "")
-                    if not txn_id:
-                        logger.warning(f"Transaction missing ID - amount: ₹{amount}, date: {txn_date}, description: {txn.get('description', 'N/A')[:50]}")
-                        # Generate a stable ID for tracking if missing (shouldn't happen for admin-panel transactions)
-                        txn_id = f"auto_{txn_date.strftime('%Y%m%d')}_{int(amount)}_{hash(str(txn.get('description', ''))[:20]) % 10000}"
-                    
-                    # FIRST CHECK: Skip if this transaction ID has already been allocated
-                    # This prevents double allocation even if sync is called multiple times
-                    if txn_id and txn_id in allocated_txn_ids:
-                        logger.info(f"⏭️  Skipping transaction ₹{amount} (ID: {txn_id[:30]}...) from {txn_date} - already allocated (found in connection metadata)")
-                        continue
-                    
-                    # SECOND CHECK: Only allocate transactions that are:
-                    # 1. After the cutoff time (connection creation OR last sync, whichever is later)
-                    # 2. OR in the future (scheduled transactions)
-                    # CRITICAL: Never allocate transactions from before connection was created
-                    is_future_date = txn_date > today
-                    is_after_cutoff = txn_date > cutoff_time  # Strictly after cutoff (not equal)
-                    is_after_connection_creation = txn_date > connection_created_at  # Additional safety check
-                    
-                    # Include transaction ONLY if:
-                    # - It's in the future (scheduled), OR
-                    # - It's after cutoff AND after connection creation (double safety check)
-                    # Removed "admin panel transaction" special case - date is the only criteria
-                    if is_future_date or (is_after_cutoff and is_after_connection_creation):
-                        new_income_transactions.append({
-                            "amount": amount,
-                            "date": txn_date,
-                            "description": txn.get("description", "Income from connection"),
-                            "id": txn_id  # Store ID for tracking
-                        })
-                        if is_future_date:
-                            reason = "future date"
-                        else:
-                            reason = "after cutoff"
-                        logger.info(f"✅ Including NEW transaction ₹{amount} (ID: {txn_id[:30]}...) from {txn_date} (reason: {reason}, cutoff: {cutoff_time}, connection_created: {connection_created_at})")
-                    else:
-                        if not is_after_connection_creation:
-                            logger.info(f"⏭️  Skipping transaction ₹{amount} (ID: {txn_id[:30]}...) from {txn_date} - BEFORE connection creation at {connection_created_at}")
-                        else:
-                            logger.info(f"⏭️  Skipping transaction ₹{amount} (ID: {txn_id[:30]}...) from {txn_date} (before cutoff {cutoff_time}, not future)")
-        
-        # Log summary of transaction processing
-        logger.info(f"📊 Found {credit_count} credit transactions out of {len(transactions)} total transactions")
-        total_checked = sum(1 for txn in transactions if isinstance(txn, dict) and txn.get("type", "").lower() == "credit" and float(txn.get("amount", 0)) > 0)
-        skipped_count = total_checked - len(new_income_transactions)
-        logger.info(f"📊 Transaction Processing Summary: Checked {total_checked} income transactions (amount > 0), {len(new_income_transactions)} NEW (will allocate), {skipped_count} skipped (already allocated or before cutoff)")
-        
-        if total_checked == 0 and len(transactions) > 0:
-            # Debug: Show what types of transactions we have
-            transaction_types = {}
-            for txn in transactions:
-                if isinstance(txn, dict):
-                    txn_type = txn.get("type", "unknown")
-                    transaction_types[txn_type] = transaction_types.get(txn_type, 0) + 1
-            logger.warning(f"⚠️  No credit transactions found! Transaction types in data: {transaction_types}")
-        
-        # If we found new income, schedule allocation in background (non-blocking)
-        # This prevents timeout - allocation happens asynchronously
-        if new_income_transactions:
-            total_new_income = sum(t["amount"] for t in new_income_transactions)
-            transaction_details = ", ".join([f"₹{t['amount']}" for t in new_income_transactions])
-            logger.info(f"💰 Found ₹{total_new_income} new income from connection '{connection.name}' ({transaction_details}). Scheduling allocation in background...")
-            
-            # Schedule allocation in background task (non-blocking)
-            background_tasks.add_task(allocate_income_from_sync, user_id, connection_id, new_income_transactions, previous_last_sync)
-            logger.info(f"Background allocation task scheduled for connection {connection_id}")
-
-        # Send spending notifications for new debit transactions since last sync (or last 7 days)
-        expense_cutoff = previous_last_sync
-        if expense_cutoff:
-            if expense_cutoff.tzinfo is None:
-                expense_cutoff = to_ist(expense_cutoff)
-            expense_cutoff = expense_cutoff - timedelta(minutes=5)
-        else:
-            expense_cutoff = today - timedelta(days=7)
-        
-        new_expense_transactions = []
-        for txn in transactions:
-            if not isinstance(txn, dict):
-                continue
-            if str(txn.get("type", "")).lower() != "debit":
-                continue
-            amount = float(txn.get("amount", 0))
-            if amount <= 0:
-                continue
-            txn_date = _normalize_timestamp(txn.get("timestamp"))
-            if txn_date and txn_date >= expense_cutoff:
-                description = txn.get("description", f"Expense via {connection.name}")
-                category = _format_spending_category(description)
-                new_expense_transactions.append({
-                    "amount": amount,
-                    "date": txn_date,
-                    "description": description,
-                    "category": category,
-                })
-        
-        if new_expense_transactions:
-            logger.info(f"Sending {len(new_expense_transactions)} spending notifications from connection '{connection.name}' after sync")
-            notify_connection_spending(db, user, new_expense_transactions)
-    except Exception as e:
-        # Don't fail sync if allocation fails
-        logger.error(f"Error in automatic income allocation during sync: {e}", exc_info=True)
+    # Parsed exactly once; the same dict feeds the background analysis and the response
+    connection_data = _ensure_dict(connection.connection_data)
+    
+    # Income detection, spending notifications and allocation all run after the response is sent,
+    # so /sync only waits for sync_connection itself
+    if connection_data:
+        background_tasks.add_task(
+            process_connection_after_sync, user_id, connection_id, connection.name,
+            connection.created_at, connection_data, previous_last_sync
+        )
+        logger.info(f"Post-sync processing task scheduled for connection {connection_id}")
     
     # IMPORTANT: Ensure connection_data is a dict before returning (response model expects dict, not JSON string)
-    # Refresh connection to get latest data
-    db.refresh(connection)
-    if connection.connection_data:
-        if isinstance(connection.connection_data, str):
-            import json
-            try:
-                connection.connection_data = json.loads(connection.connection_data)
-            except (json.JSONDecodeError, TypeError) as e:
-                logger.error(f"Failed to parse connection_data before returning response for '{connection.name}': {e}")
-                # Initialize with full structure including empty arrays
-                connection.connection_data = {
-                    "allocated_transaction_ids": [],
-                    "transactions": [],
-                    "entries": [],
-                    "monthly_summary": {},
-                    "account_id": None,
-                    "status": "connected",
-                    "balance": 0
-                }
-        # If it's already a dict, we're good
-    elif connection.connection_data is None:
-        # If connection_data is None, initialize with full structure
-        logger.warning(f"Connection '{connection.name}' has NULL connection_data after sync - initializing empty structure")
+    # Reuse the dict parsed above instead of refresh + re-parse
+    if connection_data:
+        connection.connection_data = connection_data
+    else:
+        # If connection_data is NULL or unparseable, initialize with full structure
+        logger.warning(f"Connection '{connection.name}' has no usable connection_data after sync - initializing empty structure")
         connection.connection_data = {
-            "allocated_transaction_ids": [],
             "transactions": [],
             "entries": [],
             "monthly_summary": {},
@@ -2,124 +2,99 @@
 Goals Router - Endpoints for managing user goals
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from database import get_db
-from auth import get_current_user_email
-from crud import get_user_by_email, create_goal, get_user_goals, get_goal_by_id, update_goal, delete_goal
+from deps import get_current_user, make_etag, not_modified
+from crud import CachedUser, create_goal, get_user_goals, get_goals_fingerprint, get_goal_by_id, update_goal, delete_goal
 from schemas import GoalCreate, GoalUpdate, GoalResponse, MessageResponse
-from typing import List
+from uuid import UUID
+from typing import List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/goals", tags=["goals"])
-security = HTTPBearer()
+router = APIRouter(prefix="/goals", tags=["goals"], default_response_class=ORJSONResponse)
 
 @router.post("", response_model=GoalResponse)
-async def create_user_goal(
+def create_user_goal(
     goal: GoalCreate,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    user: CachedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Create a new goal for the current user"""
-    email = get_current_user_email(credentials.credentials)
-    user = get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     return create_goal(db, user.id, goal)
 
 @router.get("", response_model=List[GoalResponse])
-async def get_goals(
+def get_goals(
+    request: Request,
+    response: Response,
     include_completed: bool = True,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    user: CachedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all goals for the current user"""
-    email = get_current_user_email(credentials.credentials)
-    user = get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
+    """Get the current user's goals, newest first (paginate with skip/limit).
+    Answers 304 when If-None-Match matches the current count/last-change fingerprint.
+    """
+    etag = make_etag("goals", user.id, include_completed, skip, limit,
+                     *get_goals_fingerprint(db, user.id, include_completed))
+    cached = not_modified(request, response, etag)
+    if cached is not None:
+        return cached
     
-    goals = get_user_goals(db, user.id, include_completed=include_completed)
+    goals = get_user_goals(db, user.id, include_completed=include_completed, skip=skip, limit=limit)
     
-    # Debug logging to help identify duplicate or incorrect goal counts
-    active_count = sum(1 for g in goals if not g.is_completed)
-    logger.info(f"User {email} ({user.id}): Returning {len(goals)} total goals, {active_count} active goals")
-    for goal in goals:
-        logger.debug(f"  Goal: {goal.id} - {goal.name} - is_completed: {goal.is_completed}, saved: {goal.saved}")
+    # Debug logging to help identify duplicate or incorrect goal counts (skipped entirely unless DEBUG is on)
+    if logger.isEnabledFor(logging.DEBUG):
+        active_count = sum(1 for g in goals if not g.is_completed)
+        logger.debug("User %s (%s): Returning %d total goals, %d active goals", user.email, user.id, len(goals), active_count)
+        for goal in goals:
+            logger.debug("  Goal: %s - %s - is_completed: %s, saved: %s", goal.id, goal.name, goal.is_completed, goal.saved)
     
     return goals
 
 @router.get("/{goal_id}", response_model=GoalResponse)
-async def get_goal(
-    goal_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+def get_goal(
+    goal_id: UUID,
+    request: Request,
+    response: Response,
+    user: CachedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific goal by ID"""
-    from uuid import UUID
-    email = get_current_user_email(credentials.credentials)
-    user = get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    goal = get_goal_by_id(db, UUID(goal_id), user.id)
+    goal = get_goal_by_id(db, goal_id, user.id)
     if not goal:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Goal not found"
         )
     
+    cached = not_modified(request, response, make_etag("goal", goal.id, goal.updated_at or goal.created_at))
+    if cached is not None:
+        return cached
     return goal
 
 @router.patch("/{goal_id}", response_model=GoalResponse)
-async def update_user_goal(
-    goal_id: str,
+def update_user_goal(
+    goal_id: UUID,
     goal_update: GoalUpdate,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    user: CachedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Update a goal"""
-    from uuid import UUID
-    email = get_current_user_email(credentials.credentials)
-    user = get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    return update_goal(db, UUID(goal_id), user.id, goal_update)
+    return update_goal(db, goal_id, user.id, goal_update)
 
 @router.delete("/{goal_id}", response_model=MessageResponse)
-async def delete_user_goal(
-    goal_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+def delete_user_goal(
+    goal_id: UUID,
+    user: CachedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Delete a goal"""
-    from uuid import UUID
-    email = get_current_user_email(credentials.credentials)
-    user = get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    delete_goal(db, UUID(goal_id), user.id)
+    delete_goal(db, goal_id, user.id)
     return {"message": "Goal deleted successfully"}
 
 
@@ -2,13 +2,13 @@
 Financial Health Score Router - Endpoints for financial health score and streaks
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from database import get_db
-from auth import get_current_user_email
-from crud import get_user_by_email, get_user_transactions, get_user_goals
-from services.financial_health import calculate_financial_health_score
+from deps import get_current_user, make_etag, not_modified
+from crud import CachedUser, get_user_transactions, get_user_goals, get_monthly_income_expense, get_health_score_fingerprint
+from services.financial_health import calculate_financial_health_score, get_cached_health_score, cache_health_score
 from services.streak_service import get_streak_info, update_savings_streak, update_transaction_streak
 from routers.coach import get_real_user_data
 from typing import Dict, Any
@@ -20,13 +20,28 @@ logger = logging.getLogger(__name__)
 # IST timezone constant (UTC+5:30)
 IST_TIMEZONE = timezone(timedelta(hours=5, minutes=30))
 
-router = APIRouter(prefix="/health-score", tags=["health-score"])
-security = HTTPBearer()
+# One-slot cache of the current IST month start; cleared when the month rolls over
+_month_start_cache: Dict[tuple, datetime] = {}
+
+def _month_start_ist() -> datetime:
+    """Start of the current month in IST"""
+    now = datetime.now(IST_TIMEZONE)
+    key = (now.year, now.month)
+    month_start = _month_start_cache.get(key)
+    if month_start is None:
+        _month_start_cache.clear()
+        month_start = datetime(now.year, now.month, 1, tzinfo=IST_TIMEZONE)
+        _month_start_cache[key] = month_start
+    return month_start
+
+router = APIRouter(prefix="/health-score", tags=["health-score"], default_response_class=ORJSONResponse)
 
 
 @router.get("")
-async def get_financial_health_score(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+def get_financial_health_score(
+    request: Request,
+    response: Response,
+    user: CachedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """
@@ -42,13 +57,16 @@ async def get_financial_health_score(
         }
     """
     try:
-        email = get_current_user_email(credentials.credentials)
-        user = get_user_by_email(db, email)
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
+        # Versioned by the goals, manual transactions and budget it reads (and the IST day),
+        # so a write handled by another worker is seen immediately
+        fingerprint = get_health_score_fingerprint(db, user.id)
+        etag = make_etag("health-score", user.id, datetime.now(IST_TIMEZONE).date(), *fingerprint)
+        cached_response = not_modified(request, response, etag)
+        if cached_response is not None:
+            return cached_response
+        cached_score = get_cached_health_score(etag)
+        if cached_score is not None:
+            return cached_score
         
         # Get user data
         goals = get_user_goals(db, user.id, include_completed=True)
@@ -56,18 +74,11 @@ async def get_financial_health_score(
         
         # Calculate monthly income and expenses
         # Use IST timezone to match transaction dates
-        now = datetime.now(IST_TIMEZONE)
-        current_month_start = datetime(now.year, now.month, 1, tzinfo=IST_TIMEZONE)
-        
-        monthly_income = sum(
-            float(t.amount) for t in transactions 
-            if t.type == "income" and t.transaction_date and t.transaction_date >= current_month_start
-        )
+        current_month_start = _month_start_ist()
         
-        monthly_expenses = sum(
-            float(t.amount) for t in transactions 
-            if t.type == "expense" and t.transaction_date and t.transaction_date >= current_month_start
-        )
+        monthly_totals = get_monthly_income_expense(db, user.id, current_month_start)
+        monthly_income = monthly_totals["income"]
+        monthly_expenses = monthly_totals["expense"]
         
         # Calculate health score (always returns valid data, even with no transactions/goals)
         health_score = calculate_financial_health_score(
@@ -80,7 +91,10 @@ async def get_financial_health_score(
         )
         
         # Ensure we always return valid structure
-        if not health_score or 'score' not in health_score:
+        if health_score and 'score' in health_score:
+            cache_health_score(etag, health_score)
+            return health_score
+        else:
             # Return default score if calculation failed
             health_score = {
                 "score": 0,
@@ -103,8 +117,8 @@ async def get_financial_health_score(
 
 
 @router.get("/streaks")
-async def get_streaks(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+def get_streaks(
+    user: CachedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """
@@ -118,14 +132,6 @@ async def get_streaks(
         }
     """
     try:
-        email = get_current_user_email(credentials.credentials)
-        user = get_user_by_email(db, email)
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         streak_info = get_streak_info(db, str(user.id))
         return streak_info
         
@@ -1,116 +1,92 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from database import get_db
 from schemas import InvestmentCreate, InvestmentResponse, InvestmentUpdate, MessageResponse
 from crud import (
+    CachedUser,
     create_investment,
     get_user_investments,
+    get_investments_fingerprint,
     get_investment_by_id,
     update_investment,
-    delete_investment,
-    get_user_by_email
+    delete_investment
 )
-from auth import get_current_user_email
+from deps import get_current_user, make_etag, not_modified
 from uuid import UUID
-from typing import List
+from typing import List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/investments", tags=["investments"])
-security = HTTPBearer()
-
-def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get current user ID from token"""
-    email = get_current_user_email(credentials.credentials)
-    user = get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    return user.id
+router = APIRouter(prefix="/investments", tags=["investments"], default_response_class=ORJSONResponse)
 
 @router.post("", response_model=InvestmentResponse)
-async def create_user_investment(
+def create_user_investment(
     investment: InvestmentCreate,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    user: CachedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Create a new investment for the current user"""
-    user = get_user_by_email(db, get_current_user_email(credentials.credentials))
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
     return create_investment(db, user.id, investment)
 
 @router.get("", response_model=List[InvestmentResponse])
-async def get_investments(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+def get_investments(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    user: CachedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all investments for the current user"""
-    user = get_user_by_email(db, get_current_user_email(credentials.credentials))
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    return get_user_investments(db, user.id)
+    """Get the current user's investments, newest first (paginate with skip/limit).
+    Answers 304 when If-None-Match matches the current count/last-change fingerprint.
+    """
+    etag = make_etag("investments", user.id, skip, limit, *get_investments_fingerprint(db, user.id))
+    cached = not_modified(request, response, etag)
+    if cached is not None:
+        return cached
+    return get_user_investments(db, user.id, skip=skip, limit=limit)
 
 @router.get("/{investment_id}", response_model=InvestmentResponse)
-async def get_investment(
-    investment_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+def get_investment(
+    investment_id: UUID,
+    request: Request,
+    response: Response,
+    user: CachedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific investment by ID"""
-    user = get_user_by_email(db, get_current_user_email(credentials.credentials))
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    investment = get_investment_by_id(db, UUID(investment_id), user.id)
+    investment = get_investment_by_id(db, investment_id, user.id)
     if not investment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Investment not found"
         )
+    cached = not_modified(request, response, make_etag(
+        "investment", investment.id, investment.updated_at or investment.created_at
+    ))
+    if cached is not None:
+        return cached
     return investment
 
 @router.patch("/{investment_id}", response_model=InvestmentResponse)
-async def update_user_investment(
-    investment_id: str,
+def update_user_investment(
+    investment_id: UUID,
     investment_update: InvestmentUpdate,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    user: CachedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Update an investment"""
-    user = get_user_by_email(db, get_current_user_email(credentials.credentials))
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    return update_investment(db, UUID(investment_id), user.id, investment_update)
+    return update_investment(db, investment_id, user.id, investment_update)
 
 @router.delete("/{investment_id}", response_model=MessageResponse)
-async def delete_user_investment(
-    investment_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+def delete_user_investment(
+    investment_id: UUID,
+    user: CachedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Delete an investment"""
-    user = get_user_by_email(db, get_current_user_email(credentials.credentials))
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    delete_investment(db, UUID(investment_id), user.id)
+    delete_investment(db, investment_id, user.id)
     return {"message": "Investment deleted successfully"}
 
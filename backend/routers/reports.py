@@ -2,17 +2,24 @@
 Reports Router - Endpoints for generating financial reports
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from database import get_db
 from auth import get_current_user_email
-from crud import get_user_by_email, get_user_transactions, get_user_connections
-from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
+from deps import make_etag, not_modified
+from cache import TTLCache
+from crud import (
+    get_user_by_email, get_user_transactions, get_user_connection_data,
+    get_manual_transaction_summary, get_report_fingerprint
+)
+from typing import Callable, Optional, List, Dict, Any, NamedTuple, Tuple
+from datetime import datetime
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
-import json
+from functools import lru_cache
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
@@ -20,31 +27,44 @@ router = APIRouter(prefix="/reports", tags=["reports"])
 security = HTTPBearer()
 
 
+# Keyword rules in priority order (first matching category wins, regardless of where the keyword appears)
+_CATEGORY_KEYWORDS = [
+    ("Food", ["food", "grocery", "restaurant", "meal", "tea", "snack"]),
+    ("Transport", ["fuel", "transport", "uber", "taxi", "ride", "delivery"]),
+    ("Bills", ["bill", "recharge", "internet", "electricity", "water", "phone"]),
+    ("Health", ["medicine", "health", "hospital", "pharmacy"]),
+    ("Rent", ["rent", "rental"]),
+    ("Income", ["salary", "wage", "income", "payment received"]),
+]
+# One compiled, case-insensitive alternation per category (same approach as routers/coach.py)
+_CATEGORY_PATTERNS = [
+    (category, re.compile("|".join(re.escape(word) for word in words), re.IGNORECASE))
+    for category, words in _CATEGORY_KEYWORDS
+]
+
+
+@lru_cache(maxsize=4096)
 def map_description_to_category(description: str) -> str:
     """Map transaction description to category"""
-    desc_lower = description.lower()
-    if any(word in desc_lower for word in ["food", "grocery", "restaurant", "meal", "tea", "snack"]):
-        return "Food"
-    elif any(word in desc_lower for word in ["fuel", "transport", "uber", "taxi", "ride", "delivery"]):
-        return "Transport"
-    elif any(word in desc_lower for word in ["bill", "recharge", "internet", "electricity", "water", "phone"]):
-        return "Bills"
-    elif any(word in desc_lower for word in ["medicine", "health", "hospital", "pharmacy"]):
-        return "Health"
-    elif any(word in desc_lower for word in ["rent", "rental"]):
-        return "Rent"
-    elif any(word in desc_lower for word in ["salary", "wage", "income", "payment received"]):
-        return "Income"
-    else:
-        return "Other"
+    for category, pattern in _CATEGORY_PATTERNS:
+        if pattern.search(description):
+            return category
+    return "Other"
 
 
-def get_transactions_for_period(db: Session, user_id, period: str) -> List[Dict[str, Any]]:
-    """Get all transactions (manual + connections) for a user within a period - optimized"""
-    transactions = []
-    
-    # Calculate date range based on period
-    now = datetime.now()
+_MONTH_NAMES = (
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+)
+
+
+def month_label(value: datetime) -> str:
+    """Month label such as "March 2026" (strftime("%B %Y") without the locale lookup)"""
+    return f"{_MONTH_NAMES[value.month - 1]} {value.year}"
+
+
+def get_period_range(period: str, now: datetime) -> Tuple[datetime, datetime]:
+    """Start and end of the reporting period ("month", "quarter" or "year") up to now"""
     if period == "month":
         start_date = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     elif period == "quarter":
@@ -54,117 +74,265 @@ def get_transactions_for_period(db: Session, user_id, period: str) -> List[Dict[
         start_date = datetime(now.year, 1, 1)
     else:
         start_date = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    
-    end_date = now
-    
-    # Get manual transactions with date filtering at database level (more efficient)
-    from models import ManualTransaction
-    from sqlalchemy import and_
-    
-    manual_transactions = db.query(ManualTransaction).filter(
-        and_(
-            ManualTransaction.user_id == user_id,
-            ManualTransaction.transaction_date >= start_date,
-            ManualTransaction.transaction_date <= end_date
-        )
-    ).order_by(ManualTransaction.transaction_date.desc()).all()
-    
-    for txn in manual_transactions:
-        txn_date = txn.transaction_date
-        if isinstance(txn_date, str):
-            try:
-                txn_date = datetime.fromisoformat(txn_date.replace("Z", "+00:00"))
-            except:
-                continue
-        # Make timezone-naive for comparison
-        if txn_date.tzinfo is not None:
-            txn_date = txn_date.replace(tzinfo=None)
+    return start_date, now
+
+
+class ConnectionTxn(NamedTuple):
+    """A connection credit/debit normalised for aggregation"""
+    date: datetime  # timezone-naive
+    amount: float
+    type: str  # "income" or "expense"
+    category: str
+
+
+# Normalised connection transactions per (connection id, last_sync, updated_at, row cap).
+# Any write to connection_data bumps last_sync or updated_at, so a changed connection never
+# hits a stale entry; the TTL only bounds memory (same scheme as crud's connection_data cache).
+CONNECTION_TXN_CACHE_TTL_SECONDS = 300
+CONNECTION_TXN_CACHE_MAX_ENTRIES = 256
+_connection_txn_cache = TTLCache(CONNECTION_TXN_CACHE_TTL_SECONDS, CONNECTION_TXN_CACHE_MAX_ENTRIES)
+
+
+def _normalize_connection_transactions(conn_data: dict, max_per_connection: int) -> List[ConnectionTxn]:
+    """The credits and debits in a connection's data, sorted by date"""
+    rows = []
+    for txn in conn_data.get("transactions", [])[:max_per_connection]:
+        if not isinstance(txn, dict):
+            continue
         
-        category = txn.category or map_description_to_category(txn.description or "")
-        transactions.append({
-            "date": txn_date.isoformat(),
-            "amount": float(txn.amount),
-            "type": txn.type,  # "income" or "expense"
-            "category": category,
-            "description": txn.description or "",
-            "source": txn.source or "manual"
-        })
-    
-    # Get connection transactions - limit processing for performance
-    connections = get_user_connections(db, user_id, status_filter="connected")
-    # Limit to first 5 connections to avoid timeout
-    for connection in connections[:5]:
-        if not connection.connection_data:
+        timestamp = txn.get("timestamp")
+        if not timestamp:
             continue
         
+        # Parse date (timezone-naive for comparison). "...Z" is by far the common form:
+        # parsing it without the suffix gives the same naive value with no tz round-trip
         try:
-            if isinstance(connection.connection_data, str):
-                conn_data = json.loads(connection.connection_data)
+            if isinstance(timestamp, str):
+                if timestamp.endswith("Z"):
+                    txn_date = datetime.fromisoformat(timestamp[:-1])
+                else:
+                    txn_date = datetime.fromisoformat(timestamp)
             else:
-                conn_data = connection.connection_data
-        except (json.JSONDecodeError, TypeError):
+                txn_date = timestamp
+            if txn_date.tzinfo is not None:
+                txn_date = txn_date.replace(tzinfo=None)
+        except Exception:
+            continue
+        
+        txn_type = txn.get("type", "").lower()
+        if txn_type == "credit":
+            rows.append(ConnectionTxn(txn_date, abs(float(txn.get("amount", 0))), "income", "Income"))
+        elif txn_type == "debit":
+            rows.append(ConnectionTxn(txn_date, abs(float(txn.get("amount", 0))), "expense",
+                                      map_description_to_category(txn.get("description", "Transaction"))))
+    rows.sort(key=lambda row: row.date)
+    return rows
+
+
+def _cached_connection_transactions(connection, conn_data: dict, max_per_connection: int) -> Tuple[List[ConnectionTxn], List[datetime]]:
+    """Normalised transactions for a connection plus their dates (both sorted by date),
+    parsed once per connection version
+    """
+    key = (str(connection.id), connection.last_sync, connection.updated_at, max_per_connection)
+    cached = _connection_txn_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    rows = _normalize_connection_transactions(conn_data, max_per_connection)
+    entry = (rows, [row.date for row in rows])
+    _connection_txn_cache.set(key, entry)
+    return entry
+
+
+# Connection scan caps, to keep the endpoints fast: reports read the first 5 connections and
+# 500 transactions each, trends the first 3 connections and 300 transactions each
+REPORT_MAX_CONNECTIONS = 5
+REPORT_MAX_TXNS_PER_CONNECTION = 500
+TRENDS_MAX_CONNECTIONS = 3
+TRENDS_MAX_TXNS_PER_CONNECTION = 300
+
+
+def get_connection_transactions(
+    db: Session,
+    user_id,
+    start_date: datetime,
+    end_date: Optional[datetime] = None,
+    max_connections: int = REPORT_MAX_CONNECTIONS,
+    max_per_connection: int = REPORT_MAX_TXNS_PER_CONNECTION
+) -> List[ConnectionTxn]:
+    """Credits and debits from a user's connected accounts dated on or after start_date
+    (and up to end_date, if given).
+    Manual transactions are summed in SQL instead (see get_manual_transaction_summary).
+    Scanning is capped at the first max_connections connections and max_per_connection
+    transactions each, to keep the report endpoints fast.
+    """
+    transactions = []
+    
+    for connection, conn_data in get_user_connection_data(db, user_id, status_filter="connected", limit=max_connections):
+        if not isinstance(conn_data, dict) or "transactions" not in conn_data:
             continue
         
         try:
-            if isinstance(conn_data, dict) and "transactions" in conn_data:
-                # Limit to recent 500 transactions per connection for performance
-                conn_transactions = conn_data.get("transactions", [])[:500]
-                for txn in conn_transactions:
-                    if not isinstance(txn, dict):
-                        continue
-                    
-                    timestamp = txn.get("timestamp")
-                    if not timestamp:
-                        continue
-                    
-                    # Parse date
-                    try:
-                        if isinstance(timestamp, str):
-                            txn_date = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-                        else:
-                            txn_date = timestamp
-                        # Make timezone-naive for comparison
-                        if txn_date.tzinfo is not None:
-                            txn_date = txn_date.replace(tzinfo=None)
-                    except Exception:
-                        continue
-                    
-                    # Check if within period (early exit for performance)
-                    if not (start_date <= txn_date <= end_date):
-                        continue
-                    
-                    txn_type = txn.get("type", "").lower()
-                    amount = float(txn.get("amount", 0))
-                    description = txn.get("description", "Transaction")
-                    category = map_description_to_category(description)
-                    
-                    if txn_type == "credit":
-                        transactions.append({
-                            "date": txn_date.isoformat(),
-                            "amount": abs(amount),
-                            "type": "income",
-                            "category": "Income",
-                            "description": description,
-                            "source": connection.type or "connection"
-                        })
-                    elif txn_type == "debit":
-                        transactions.append({
-                            "date": txn_date.isoformat(),
-                            "amount": abs(amount),
-                            "type": "expense",
-                            "category": category,
-                            "description": description,
-                            "source": connection.type or "connection"
-                        })
+            rows, dates = _cached_connection_transactions(connection, conn_data, max_per_connection)
         except Exception as e:
             logger.warning(f"Error processing connection transactions: {e}")
             continue
+        
+        # Rows are sorted by date, so the period is a slice rather than a per-row filter
+        lo = bisect_left(dates, start_date)
+        hi = bisect_right(dates, end_date) if end_date is not None else len(rows)
+        transactions.extend(rows[lo:hi])
     
     return transactions
 
 
+# Number of months shown by /trends for each period
+TREND_MONTHS = {"month": 1, "quarter": 3, "year": 12}
+
+
+def get_trend_month_starts(period: str, now: datetime) -> List[datetime]:
+    """Exact calendar month starts shown for a period, oldest first, ending with the current month"""
+    current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    month_starts = []
+    for i in range(TREND_MONTHS[period] - 1, -1, -1):
+        year, month_index = divmod(current_month_start.year * 12 + current_month_start.month - 1 - i, 12)
+        month_starts.append(current_month_start.replace(year=year, month=month_index + 1))
+    return month_starts
+
+
+def load_report_data(db: Session, user_id, start_date: datetime, end_date: datetime,
+                     max_connections: int = REPORT_MAX_CONNECTIONS,
+                     max_per_connection: int = REPORT_MAX_TXNS_PER_CONNECTION) -> Tuple[list, List[ConnectionTxn]]:
+    """Everything a report or trend needs from [start_date, end_date] in one pass:
+    manual transactions pre-summed per month/type/category by the DB, plus connection
+    transactions (stored as JSON, so walked in Python - see get_connection_transactions).
+    """
+    return (
+        get_manual_transaction_summary(db, user_id, start_date, end_date),
+        get_connection_transactions(db, user_id, start_date, end_date, max_connections, max_per_connection)
+    )
+
+
+def summarize_period(manual_groups: list, connection_txns: List[ConnectionTxn], period: str,
+                     start_date: datetime, now: datetime) -> Dict[str, Any]:
+    """Income, expenses, savings, savings rate and category breakdown from start_date on.
+    start_date is always a month start, so manual groups are picked by month.
+    """
+    start_month = (start_date.year, start_date.month)
+    total_income = 0.0
+    total_expenses = 0.0
+    transaction_count = 0
+    category_totals = defaultdict(float)
+    for month_key, txn_type, category, description, amount, count in manual_groups:
+        if month_key < start_month:
+            continue
+        transaction_count += count
+        if txn_type == "income":
+            total_income += amount
+        elif txn_type == "expense":
+            total_expenses += amount
+            category_totals[category or map_description_to_category(description or "")] += amount
+    for txn_date, amount, txn_type, category in connection_txns:
+        if txn_date < start_date:
+            continue
+        transaction_count += 1
+        if txn_type == "income":
+            total_income += amount
+        else:
+            total_expenses += amount
+            category_totals[category] += amount
+    total_savings = total_income - total_expenses
+    savings_rate = (total_savings / total_income * 100) if total_income > 0 else 0
+    
+    # Add income to category breakdown
+    if total_income > 0:
+        category_totals["Income"] = total_income
+    
+    # Format category breakdown
+    category_breakdown = []
+    for category, amount in sorted(category_totals.items(), key=lambda x: x[1], reverse=True):
+        percentage = (amount / total_income * 100) if total_income > 0 else 0
+        category_breakdown.append({
+            "category": category,
+            "amount": round(amount, 2),
+            "percentage": round(percentage, 1)
+        })
+    
+    # Format period label
+    if period == "month":
+        period_label = month_label(now)
+    elif period == "quarter":
+        quarter = (now.month - 1) // 3 + 1
+        period_label = f"Q{quarter} {now.year}"
+    else:
+        period_label = str(now.year)
+    
+    return {
+        "period": period,
+        "period_label": period_label,
+        "income": round(total_income, 2),
+        "expenses": round(total_expenses, 2),
+        "savings": round(total_savings, 2),
+        "savings_rate": round(savings_rate, 1),
+        "category_breakdown": category_breakdown,
+        "transaction_count": transaction_count
+    }
+
+
+def summarize_trends(manual_groups: list, connection_txns: List[ConnectionTxn],
+                     month_starts: List[datetime]) -> List[Dict[str, Any]]:
+    """Income, expenses and savings per month for the given month starts"""
+    # Bucket everything by calendar month in a single pass
+    monthly_totals = defaultdict(lambda: {"income": 0.0, "expense": 0.0})
+    for month_key, txn_type, _, _, amount, _ in manual_groups:
+        if txn_type in ("income", "expense"):
+            monthly_totals[month_key][txn_type] += amount
+    for txn_date, amount, txn_type, _ in connection_txns:
+        monthly_totals[(txn_date.year, txn_date.month)][txn_type] += amount
+    
+    trends = []
+    for month_start in month_starts:
+        totals = monthly_totals.get((month_start.year, month_start.month), {"income": 0.0, "expense": 0.0})
+        trends.append({
+            "month": month_label(month_start),
+            "income": round(totals["income"], 2),
+            "expenses": round(totals["expense"], 2),
+            "savings": round(totals["income"] - totals["expense"], 2)
+        })
+    return trends
+
+
+# Report payloads keyed by their ETag. The tag already encodes the data version (see
+# get_report_fingerprint), so entries never go stale; the TTL only bounds memory.
+REPORT_CACHE_TTL_SECONDS = 30
+REPORT_CACHE_MAX_ENTRIES = 1024
+_report_cache = TTLCache(REPORT_CACHE_TTL_SECONDS, REPORT_CACHE_MAX_ENTRIES)
+
+
+def cached_report(request: Request, response: Response, db: Session, user_id, kind: str,
+                  period: str, now: datetime, build: Callable[[], Dict[str, Any]]):
+    """Serve a report payload by data version: a 304 if the client already has it, this
+    process's copy if it was built recently, otherwise build() it (and cache it).
+    The date is part of the version because the report windows move with it.
+    """
+    etag = make_etag(kind, user_id, period, now.date(), *get_report_fingerprint(db, user_id))
+    cached_response = not_modified(request, response, etag)
+    if cached_response is not None:
+        return cached_response
+    
+    cached = _report_cache.get(etag)
+    if cached is not None:
+        return cached
+    
+    payload = build()
+    _report_cache.set(etag, payload)
+    return payload
+
+
 @router.get("")
-async def get_reports(
+def get_reports(
+    request: Request,
+    response: Response,
     period: str = "month",  # "month", "quarter", or "year"
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
@@ -186,56 +354,14 @@ async def get_reports(
         if period not in ["month", "quarter", "year"]:
             period = "month"
         
-        # Get transactions for the period
-        transactions = get_transactions_for_period(db, user.id, period)
-        
-        # Calculate totals
-        total_income = sum(t["amount"] for t in transactions if t["type"] == "income")
-        total_expenses = sum(t["amount"] for t in transactions if t["type"] == "expense")
-        total_savings = total_income - total_expenses
-        savings_rate = (total_savings / total_income * 100) if total_income > 0 else 0
-        
-        # Calculate category breakdown
-        category_totals = defaultdict(float)
-        for txn in transactions:
-            if txn["type"] == "expense":
-                category = txn["category"]
-                category_totals[category] += txn["amount"]
-        
-        # Add income to category breakdown
-        if total_income > 0:
-            category_totals["Income"] = total_income
-        
-        # Format category breakdown
-        category_breakdown = []
-        for category, amount in sorted(category_totals.items(), key=lambda x: x[1], reverse=True):
-            percentage = (amount / total_income * 100) if total_income > 0 else 0
-            category_breakdown.append({
-                "category": category,
-                "amount": round(amount, 2),
-                "percentage": round(percentage, 1)
-            })
-        
-        # Format period label
         now = datetime.now()
-        if period == "month":
-            period_label = now.strftime("%B %Y")
-        elif period == "quarter":
-            quarter = (now.month - 1) // 3 + 1
-            period_label = f"Q{quarter} {now.year}"
-        else:
-            period_label = str(now.year)
         
-        return {
-            "period": period,
-            "period_label": period_label,
-            "income": round(total_income, 2),
-            "expenses": round(total_expenses, 2),
-            "savings": round(total_savings, 2),
-            "savings_rate": round(savings_rate, 1),
-            "category_breakdown": category_breakdown,
-            "transaction_count": len(transactions)
-        }
+        def build():
+            start_date, end_date = get_period_range(period, now)
+            manual_groups, connection_txns = load_report_data(db, user.id, start_date, end_date)
+            return summarize_period(manual_groups, connection_txns, period, start_date, now)
+        
+        return cached_report(request, response, db, user.id, "reports", period, now, build)
     
     except HTTPException:
         raise
@@ -248,7 +374,9 @@ async def get_reports(
 
 
 @router.get("/trends")
-async def get_trends(
+def get_trends(
+    request: Request,
+    response: Response,
     period: str = "month",  # "month", "quarter", or "year"
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
@@ -270,155 +398,74 @@ async def get_trends(
         if period not in ["month", "quarter", "year"]:
             period = "month"
         
-        # Calculate how many months to show
-        if period == "month":
-            months = 1
-        elif period == "quarter":
-            months = 3
-        else:
-            months = 12
-        
-        # Get all transactions first (no period filter) - optimized with date range
-        all_transactions = []
         now = datetime.now()
         
-        # Calculate date range for trends (go back enough months)
-        if period == "month":
-            months_back = 1
-        elif period == "quarter":
-            months_back = 3
-        else:
-            months_back = 12
-        
-        # Calculate earliest date needed
-        earliest_date = (now - timedelta(days=months_back * 32)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        # Get manual transactions with date filtering at database level
-        from models import ManualTransaction
-        from sqlalchemy import and_
+        def build():
+            month_starts = get_trend_month_starts(period, now)
+            manual_groups, connection_txns = load_report_data(
+                db, user.id, month_starts[0], now, TRENDS_MAX_CONNECTIONS, TRENDS_MAX_TXNS_PER_CONNECTION
+            )
+            return {"trends": summarize_trends(manual_groups, connection_txns, month_starts)}
         
-        manual_transactions = db.query(ManualTransaction).filter(
-            and_(
-                ManualTransaction.user_id == user.id,
-                ManualTransaction.transaction_date >= earliest_date,
-                ManualTransaction.transaction_date <= now
+        return cached_report(request, response, db, user.id, "trends", period, now, build)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Error generating trends for user {user.id if 'user' in locals() else 'unknown'}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to generate trends: {str(e)}"
+        )
+
+
+@router.get("/summary")
+def get_report_summary(
+    request: Request,
+    response: Response,
+    period: str = "month",  # "month", "quarter", or "year"
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the report and the trends for a period together, sharing the manual transaction summary.
+    Returns {"report": <same as GET /reports>, "trends": <same as GET /reports/trends>["trends"]}.
+    """
+    try:
+        email = get_current_user_email(credentials.credentials)
+        user = get_user_by_email(db, email)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
             )
-        ).order_by(ManualTransaction.transaction_date.desc()).all()
         
-        for txn in manual_transactions:
-            txn_date = txn.transaction_date
-            if isinstance(txn_date, str):
-                try:
-                    txn_date = datetime.fromisoformat(txn_date.replace("Z", "+00:00"))
-                except:
-                    continue
-            if txn_date.tzinfo is not None:
-                txn_date = txn_date.replace(tzinfo=None)
-            
-            category = txn.category or map_description_to_category(txn.description or "")
-            all_transactions.append({
-                "date": txn_date,
-                "amount": float(txn.amount),
-                "type": txn.type,
-                "category": category,
-            })
+        # Validate period
+        if period not in ["month", "quarter", "year"]:
+            period = "month"
         
-        # Get connection transactions - limit for performance
-        connections = get_user_connections(db, user.id, status_filter="connected")
-        # Limit to first 3 connections for trends to avoid timeout
-        for connection in connections[:3]:
-            if not connection.connection_data:
-                continue
-            try:
-                if isinstance(connection.connection_data, str):
-                    conn_data = json.loads(connection.connection_data)
-                else:
-                    conn_data = connection.connection_data
-            except:
-                continue
-            
-            try:
-                if isinstance(conn_data, dict) and "transactions" in conn_data:
-                    # Limit to recent 300 transactions per connection for trends
-                    conn_transactions = conn_data.get("transactions", [])[:300]
-                    for txn in conn_transactions:
-                        if not isinstance(txn, dict):
-                            continue
-                        timestamp = txn.get("timestamp")
-                        if not timestamp:
-                            continue
-                        try:
-                            if isinstance(timestamp, str):
-                                txn_date = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-                            else:
-                                txn_date = timestamp
-                            if txn_date.tzinfo is not None:
-                                txn_date = txn_date.replace(tzinfo=None)
-                        except:
-                            continue
-                        
-                        # Early exit if before earliest date
-                        if txn_date < earliest_date:
-                            continue
-                        
-                        txn_type = txn.get("type", "").lower()
-                        amount = float(txn.get("amount", 0))
-                        description = txn.get("description", "Transaction")
-                        category = map_description_to_category(description)
-                        
-                        if txn_type == "credit":
-                            all_transactions.append({
-                                "date": txn_date,
-                                "amount": abs(amount),
-                                "type": "income",
-                                "category": "Income",
-                            })
-                        elif txn_type == "debit":
-                            all_transactions.append({
-                                "date": txn_date,
-                                "amount": abs(amount),
-                                "type": "expense",
-                                "category": category,
-                            })
-            except Exception:
-                continue
+        now = datetime.now()
         
-        # Calculate monthly data
-        trends = []
-        for i in range(months):
-            # Calculate month start/end
-            month_date = now - timedelta(days=30 * (months - i - 1))
-            month_start = month_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            if month_start.month == 12:
-                month_end = datetime(month_start.year + 1, 1, 1) - timedelta(days=1)
-            else:
-                month_end = datetime(month_start.year, month_start.month + 1, 1) - timedelta(days=1)
-            month_end = month_end.replace(hour=23, minute=59, second=59)
-            
-            # Filter transactions for this month
-            month_transactions = [
-                t for t in all_transactions
-                if month_start <= t["date"] <= month_end
-            ]
-            
-            month_income = sum(t["amount"] for t in month_transactions if t["type"] == "income")
-            month_expenses = sum(t["amount"] for t in month_transactions if t["type"] == "expense")
-            
-            trends.append({
-                "month": month_start.strftime("%B %Y"),
-                "income": round(month_income, 2),
-                "expenses": round(month_expenses, 2),
-                "savings": round(month_income - month_expenses, 2)
-            })
+        def build():
+            start_date, end_date = get_period_range(period, now)
+            month_starts = get_trend_month_starts(period, now)
+            manual_groups, report_txns = load_report_data(db, user.id, min(start_date, month_starts[0]), end_date)
+            # Trends keep their own, smaller connection caps so they match GET /reports/trends
+            trend_txns = get_connection_transactions(
+                db, user.id, month_starts[0], now, TRENDS_MAX_CONNECTIONS, TRENDS_MAX_TXNS_PER_CONNECTION
+            )
+            return {
+                "report": summarize_period(manual_groups, report_txns, period, start_date, now),
+                "trends": summarize_trends(manual_groups, trend_txns, month_starts)
+            }
         
-        return {"trends": trends}
+        return cached_report(request, response, db, user.id, "summary", period, now, build)
     
     except HTTPException:
         raise
     except Exception as e:
-        logger.exception(f"Error generating trends for user {user.id if 'user' in locals() else 'unknown'}: {e}")
+        logger.exception(f"Error generating report summary for user {user.id if 'user' in locals() else 'unknown'}: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to generate trends: {str(e)}"
+            detail=f"Failed to generate report summary: {str(e)}"
         )
-
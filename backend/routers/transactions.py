@@ -19,7 +19,7 @@ from schemas import ManualTransactionCreate, ManualTransactionResponse, MessageR
 from typing import List, Optional
 from routers.coach import get_real_user_data
 from services.agentic_ai import ToolRegistry, ToolType
-from services.ai_coach import determine_allocation_percentages
+from services.ai_coach import determine_allocation_percentages, income_based_goal_targets
 from services.streak_service import update_transaction_streak, update_savings_streak
 from email_service import (
     send_spending_activity_email,
@@ -38,14 +38,14 @@ def allocate_income_to_goals(user_id, transaction_id, income_amount):
     """Background task to allocate income to goals after transaction is created"""
     logger.info(f"BACKGROUND TASK STARTED: Allocating ₹{income_amount} income to goals for user {user_id}")
     try:
-        from database import SessionLocal
+        from database import BackgroundSessionLocal
         from crud import get_user_by_id
         from routers.coach import get_real_user_data
         from services.agentic_ai import ToolRegistry, ToolType
         from services.ai_coach import determine_allocation_percentages, emergency_fund_agent
         from email_service import send_income_allocation_email
         
-        background_db = SessionLocal()
+        background_db = BackgroundSessionLocal()
         try:
             user = get_user_by_id(background_db, str(user_id))
             if not user:
@@ -69,36 +69,16 @@ def allocate_income_to_goals(user_id, transaction_id, income_amount):
             # Get all goals
             goals_result = tool_registry.execute_tool(ToolType.GET_GOALS, {}, "transaction_creation")
             
+            # Income-based targets, shared by goal creation (STEP 0) and target updates (STEP 1)
+            targets = income_based_goal_targets(user_data, income_amount)
+            
             # STEP 0: If no goals exist, create them automatically based on income
             if not goals_result.get("success") or not goals_result.get("goals") or len(goals_result.get("goals", [])) == 0:
                 logger.info("No goals found. Creating goals automatically based on income patterns...")
                 
-                # Analyze income to create adaptive goals
-                from services.ai_coach import income_pattern_agent, get_last_3_months_transactions
-                income_analysis = income_pattern_agent(user_data)
-                
-                # Calculate average monthly income
-                recent_txs = get_last_3_months_transactions(user_data)
-                income_txs = [t for t in recent_txs if float(t[1]) > 0]
-                total_income = sum(float(t[1]) for t in income_txs) if income_txs else income_amount
-                avg_monthly_income = total_income / max(3, len(income_txs)) if income_txs else income_amount
-                
-                # If no historical data, use current income as baseline
-                if avg_monthly_income == 0 or not income_txs:
-                    avg_monthly_income = income_amount * 30  # Estimate monthly from single transaction
-                
-                # Calculate emergency fund (3-6 months expenses, assume 70% of income goes to expenses)
-                avg_monthly_expenses = avg_monthly_income * 0.7
-                emergency_fund_target = int(avg_monthly_expenses * 4.5)  # 4.5 months average
-                
-                # Create adaptive savings goals based on income
-                savings_goal_1_target = int(avg_monthly_income * 2)  # 2 months income
-                savings_goal_2_target = int(avg_monthly_income * 1.5)  # 1.5 months income
-                
-                # Ensure minimum values
-                emergency_fund_target = max(10000, emergency_fund_target)
-                savings_goal_1_target = max(5000, savings_goal_1_target)
-                savings_goal_2_target = max(3000, savings_goal_2_target)
+                emergency_fund_target = targets["emergency_target"]
+                savings_goal_1_target = targets["savings_1_target"]
+                savings_goal_2_target = targets["savings_2_target"]
                 
                 # Create goals using tool registry
                 from schemas import GoalCreate
@@ -163,28 +143,11 @@ def allocate_income_to_goals(user_id, transaction_id, income_amount):
                 goals = goals_result["goals"]
                 
                 # STEP 1: Update goal targets adaptively based on income changes
-                from services.ai_coach import income_pattern_agent, get_last_3_months_transactions
-                income_analysis = income_pattern_agent(user_data)
-                
-                # Calculate average monthly income
-                recent_txs = get_last_3_months_transactions(user_data)
-                income_txs = [t for t in recent_txs if float(t[1]) > 0]
-                total_income = sum(float(t[1]) for t in income_txs) if income_txs else income_amount
-                avg_monthly_income = total_income / max(3, len(income_txs)) if income_txs else income_amount
-                
-                if avg_monthly_income == 0 or not income_txs:
-                    avg_monthly_income = income_amount * 30
-                
-                # Calculate new recommended targets
-                avg_monthly_expenses = avg_monthly_income * 0.7
-                new_emergency_target = int(avg_monthly_expenses * 4.5)
-                new_savings_1_target = int(avg_monthly_income * 2)
-                new_savings_2_target = int(avg_monthly_income * 1.5)
-                
-                # Ensure minimum values
-                new_emergency_target = max(10000, new_emergency_target)
-                new_savings_1_target = max(5000, new_savings_1_target)
-                new_savings_2_target = max(3000, new_savings_2_target)
+                new_emergency_target = targets["emergency_target"]
+                new_savings_1_target = targets["savings_1_target"]
+                new_savings_2_target = targets["savings_2_target"]
+                # Only re-fetch goals below if a target actually changed
+                goals_dirty = False
                 
                 # Update emergency fund target adaptively
                 if emergency_analysis.get("recommended_buffer"):
@@ -208,6 +171,7 @@ def allocate_income_to_goals(user_id, transaction_id, income_amount):
                                 "transaction_creation"
                             )
                             if update_result.get("success"):
+                                goals_dirty = True
                                 logger.info(f"Updated Emergency Fund target from ₹{current_target:,} to ₹{recommended:,}")
                 
                 # Update savings goals adaptively
@@ -223,6 +187,7 @@ def allocate_income_to_goals(user_id, transaction_id, income_amount):
                             "transaction_creation"
                         )
                         if update_result.get("success"):
+                            goals_dirty = True
                             logger.info(f"Updated '{goal_1.get('name')}' target from ₹{current_target_1:,} to ₹{new_savings_1_target:,}")
                 
                 if len(regular_goals) > 1:
@@ -235,12 +200,14 @@ def allocate_income_to_goals(user_id, transaction_id, income_amount):
                             "transaction_creation"
                         )
                         if update_result.get("success"):
+                            goals_dirty = True
                             logger.info(f"Updated '{goal_2.get('name')}' target from ₹{current_target_2:,} to ₹{new_savings_2_target:,}")
                 
                 # Refresh goals after updates
-                goals_result = tool_registry.execute_tool(ToolType.GET_GOALS, {}, "transaction_creation")
-                if goals_result.get("success"):
-                    goals = goals_result["goals"]
+                if goals_dirty:
+                    goals_result = tool_registry.execute_tool(ToolType.GET_GOALS, {}, "transaction_creation")
+                    if goals_result.get("success"):
+                        goals = goals_result["goals"]
                 
                 # STEP 2: Use LLM to determine optimal allocation percentages
                 active_goals = [g for g in goals if not g.get("is_completed", False)]
@@ -398,7 +365,7 @@ def allocate_income_to_goals(user_id, transaction_id, income_amount):
                     else:
                         logger.warning(f"No allocation made - goals may have target 0 or are already completed")
         finally:
-            background_db.close()
+            BackgroundSessionLocal.remove()
             logger.info(f"BACKGROUND TASK COMPLETED: Income allocation for transaction {transaction_id}")
     except Exception as e:
         logger.error(f"❌ ERROR in background income allocation for transaction {transaction_id}: {e}", exc_info=True)
@@ -26,6 +26,7 @@ class ToolType(str, Enum):
     CREATE_GOAL = "create_goal"
     UPDATE_GOAL = "update_goal"
     ALLOCATE_TO_GOAL = "allocate_to_goal"
+    ALLOCATE_BATCH = "allocate_batch"
     CREATE_TRANSACTION = "create_transaction"
     GET_GOALS = "get_goals"
     GET_TRANSACTIONS = "get_transactions"
@@ -126,6 +127,19 @@ class ToolRegistry:
             )
         )
         
+        # Allocate Batch Tool
+        self.register_tool(
+            Tool(
+                name=ToolType.ALLOCATE_BATCH,
+                description="Allocate money from income to several goals at once, committed together.",
+                parameters={
+                    "allocations": {"type": "array", "description": "List of {goal_id, amount} allocations"}
+                },
+                function=self._allocate_batch_tool,
+                requires_confirmation=False
+            )
+        )
+        
         # Create Transaction Tool
         self.register_tool(
             Tool(
@@ -338,6 +352,67 @@ class ToolRegistry:
             logger.error(f"Error allocating to goal: {e}")
             return {"success": False, "error": str(e)}
     
+    def _allocate_batch_tool(self, **kwargs) -> Dict[str, Any]:
+        """Allocate money to several goals in one transaction (one SELECT, one commit)"""
+        try:
+            from models import Goal
+            from uuid import UUID as UUIDType
+            
+            allocations = [
+                (UUIDType(str(a["goal_id"])), Decimal(str(a.get("amount", 0))))
+                for a in kwargs.get("allocations", [])
+                if a.get("goal_id")
+            ]
+            if not allocations:
+                return {"success": True, "results": []}
+            
+            goals = self.db.query(Goal).filter(
+                Goal.user_id == self.user_id,
+                Goal.id.in_({goal_id for goal_id, _ in allocations})
+            ).all()
+            goals_by_id = {goal.id: goal for goal in goals}
+            
+            results = []
+            for goal_id, amount in allocations:
+                goal = goals_by_id.get(goal_id)
+                if not goal:
+                    results.append({"success": False, "goal_id": str(goal_id), "error": "Goal not found"})
+                    continue
+                
+                new_saved = min(goal.saved + amount, goal.target)  # Cap at target
+                goal.saved = new_saved
+                is_completed = new_saved >= goal.target
+                if is_completed:
+                    goal.is_completed = True
+                
+                result = {
+                    "goal_id": str(goal.id),
+                    "allocated": float(amount),
+                    "new_saved": float(new_saved),
+                    "completed": is_completed
+                }
+                self.memory.actions_taken.append(
+                    ToolCall(
+                        tool_name=ToolType.ALLOCATE_TO_GOAL,
+                        arguments={"goal_id": str(goal_id), "amount": float(amount)},
+                        agent="goal_planner_agent",
+                        executed=True,
+                        result=result
+                    )
+                )
+                results.append({
+                    "success": True,
+                    **result,
+                    "message": f"Allocated ₹{amount} to '{goal.name}'. Total saved: ₹{new_saved}"
+                })
+            
+            self.db.commit()
+            return {"success": True, "results": results}
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error allocating batch to goals: {e}")
+            return {"success": False, "error": str(e)}
+    
     def _create_transaction_tool(self, **kwargs) -> Dict[str, Any]:
         """Create transaction tool implementation"""
         try:
@@ -385,27 +460,14 @@ class ToolRegistry:
     def _get_goals_tool(self, **kwargs) -> Dict[str, Any]:
         """Get goals tool implementation"""
         try:
-            from crud import get_user_goals
+            from crud import get_goals_for_user
             
             # Include completed goals so agents can see all goals (including completed emergency funds)
             include_completed = kwargs.get("include_completed", True)
-            goals = get_user_goals(self.db, self.user_id, include_completed=include_completed)
             
             return {
                 "success": True,
-                "goals": [
-                    {
-                        "id": str(g.id),
-                        "name": g.name,
-                        "target": float(g.target),
-                        "saved": float(g.saved),
-                        "remaining": float(g.target - g.saved),
-                        "type": g.type,
-                        "is_completed": g.is_completed,
-                        "deadline": g.deadline.isoformat() if g.deadline else None
-                    }
-                    for g in goals
-                ]
+                "goals": get_goals_for_user(self.db, self.user_id, include_completed=include_completed)
             }
         except Exception as e:
             logger.error(f"Error getting goals: {e}")
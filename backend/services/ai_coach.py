@@ -11,8 +11,10 @@ import statistics
 import re
 import logging
 import json
-from typing import Dict, List, Optional, Any
+import hashlib
+from typing import Dict, List, Optional, Any, Callable
 from config import settings
+from cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -320,6 +322,58 @@ def emergency_fund_agent(user_data: Dict) -> Dict[str, Any]:
     return {"recommended_buffer": buffer, "dry_warning": dry_warning}
 
 
+def income_based_goal_targets(user_data: Dict, income_amount: float) -> Dict[str, Any]:
+    """Adaptive goal targets from the last 3 months of income.
+    Falls back to income_amount * 30 as the monthly estimate when there is no income history.
+    """
+    recent_income = [float(t[1]) for t in get_last_3_months_transactions(user_data) if float(t[1]) > 0]
+    avg_monthly_income = sum(recent_income) / max(3, len(recent_income)) if recent_income else 0
+    if avg_monthly_income == 0:
+        avg_monthly_income = income_amount * 30
+
+    # Emergency fund covers 4.5 months of expenses (assume 70% of income goes to expenses);
+    # savings goals are 2 and 1.5 months of income. Each has a minimum.
+    avg_monthly_expenses = avg_monthly_income * 0.7
+    return {
+        "avg_monthly_income": avg_monthly_income,
+        "avg_monthly_expenses": avg_monthly_expenses,
+        "emergency_target": max(10000, int(avg_monthly_expenses * 4.5)),
+        "savings_1_target": max(5000, int(avg_monthly_income * 2)),
+        "savings_2_target": max(3000, int(avg_monthly_income * 1.5)),
+    }
+
+
+# ------------------------- AGENT RESULT CACHE -------------------------
+
+# Agent outputs are pure functions of the user's transactions (and today's date),
+# so repeated syncs with unchanged transactions can reuse them.
+AGENT_CACHE_TTL_SECONDS = 3600
+AGENT_CACHE_MAX_ENTRIES = 1024
+_agent_cache = TTLCache(AGENT_CACHE_TTL_SECONDS, AGENT_CACHE_MAX_ENTRIES)
+
+
+def _transactions_fingerprint(user_data: Dict) -> str:
+    """Short stable hash of the user's normalized transactions."""
+    digest = hashlib.blake2b(digest_size=8)
+    for t in ensure_transactions_list(user_data):
+        digest.update(repr(t).encode())
+    return digest.hexdigest()
+
+
+def cached_agent(name: str, user_id, user_data: Dict, fn: Callable[[Dict], Dict[str, Any]]) -> Dict[str, Any]:
+    """Run an agent through an in-process TTL cache keyed by user and transaction hash.
+    Callers must treat the returned dict as read-only (it is shared between calls).
+    """
+    key = f"agent:{name}:{user_id}:{datetime.date.today().isoformat()}:{_transactions_fingerprint(user_data)}"
+    cached = _agent_cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = fn(user_data)
+    _agent_cache.set(key, result)
+    return result
+
+
 # ------------------------- LLM HELPER -------------------------
 
 def call_llm(prompt: str, temperature: float = 0.2) -> Dict[str, str]:
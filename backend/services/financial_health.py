@@ -9,9 +9,27 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta, date
 from decimal import Decimal
 from sqlalchemy.orm import Session
+from cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# ------------------------- HEALTH SCORE CACHE -------------------------
+
+# Health scores keyed by their ETag. The tag encodes the data version (crud.get_health_score_fingerprint)
+# and the IST day, so a write handled by any worker changes the key; the TTL only bounds memory.
+HEALTH_SCORE_CACHE_TTL_SECONDS = 300
+HEALTH_SCORE_CACHE_MAX_ENTRIES = 4096
+_health_score_cache = TTLCache(HEALTH_SCORE_CACHE_TTL_SECONDS, HEALTH_SCORE_CACHE_MAX_ENTRIES)
+
+
+def get_cached_health_score(etag: str) -> Optional[Dict[str, Any]]:
+    """Score cached under this ETag, or None. Callers must treat the returned dict as read-only."""
+    return _health_score_cache.get(etag)
+
+
+def cache_health_score(etag: str, health_score: Dict[str, Any]) -> None:
+    _health_score_cache.set(etag, health_score)
+
 
 def calculate_financial_health_score(
     db: Session,
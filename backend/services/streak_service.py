@@ -21,20 +21,25 @@ def get_ist_today() -> date:
     return datetime.now(IST_TIMEZONE).date()
 
 
+def _new_streak(user_id: str) -> UserStreak:
+    """Build a zeroed streak row (not yet added to any session)"""
+    return UserStreak(
+        user_id=user_id,
+        savings_streak=0,
+        transaction_streak=0,
+        longest_savings_streak=0,
+        longest_transaction_streak=0,
+        total_savings_days=0,
+        total_transaction_days=0
+    )
+
+
 def get_or_create_streak(db: Session, user_id: str) -> UserStreak:
     """Get existing streak or create new one"""
     streak = db.query(UserStreak).filter(UserStreak.user_id == user_id).first()
     
     if not streak:
-        streak = UserStreak(
-            user_id=user_id,
-            savings_streak=0,
-            transaction_streak=0,
-            longest_savings_streak=0,
-            longest_transaction_streak=0,
-            total_savings_days=0,
-            total_transaction_days=0
-        )
+        streak = _new_streak(user_id)
         db.add(streak)
         db.commit()
         db.refresh(streak)
@@ -55,7 +60,11 @@ def update_savings_streak(db: Session, user_id: str, amount: float) -> Dict[str,
         }
     """
     try:
-        streak = get_or_create_streak(db, user_id)
+        # Read-only: users without a row yet get a transient zeroed streak
+        # instead of an INSERT + commit on a GET request
+        streak = db.query(UserStreak).filter(UserStreak.user_id == user_id).first()
+        if streak is None:
+            streak = _new_streak(user_id)
         today = get_ist_today()
         
         # Check if last savings was yesterday (continues streak) or today (already counted)
@@ -133,7 +142,11 @@ def update_transaction_streak(db: Session, user_id: str) -> Dict[str, Any]:
         }
     """
     try:
-        streak = get_or_create_streak(db, user_id)
+        # Read-only: users without a row yet get a transient zeroed streak
+        # instead of an INSERT + commit on a GET request
+        streak = db.query(UserStreak).filter(UserStreak.user_id == user_id).first()
+        if streak is None:
+            streak = _new_streak(user_id)
         today = get_ist_today()
         
         # Check if last transaction was yesterday (continues streak) or today (already counted)
@@ -208,7 +221,11 @@ def get_streak_info(db: Session, user_id: str) -> Dict[str, Any]:
         }
     """
     try:
-        streak = get_or_create_streak(db, user_id)
+        # Read-only: users without a row yet get a transient zeroed streak
+        # instead of an INSERT + commit on a GET request
+        streak = db.query(UserStreak).filter(UserStreak.user_id == user_id).first()
+        if streak is None:
+            streak = _new_streak(user_id)
         today = get_ist_today()
         
         # Check if streaks are still active (not broken)
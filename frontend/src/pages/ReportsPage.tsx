@@ -53,12 +53,9 @@ const ReportsPage: React.FC = () => {
     try {
       setLoading(true);
       setError(null);
-      const [report, trends] = await Promise.all([
-        reportsAPI.getReports(selectedPeriod),
-        reportsAPI.getTrends(selectedPeriod),
-      ]);
-      setReportData(report);
-      setTrendsData(trends.trends || []);
+      const summary = await reportsAPI.getSummary(selectedPeriod);
+      setReportData(summary.report);
+      setTrendsData(summary.trends || []);
     } catch (err: any) {
       console.error('Error loading reports:', err);
       setError(err.response?.data?.detail || err.message || 'Failed to load reports');
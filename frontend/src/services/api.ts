@@ -320,6 +320,14 @@ export const reportsAPI = {
     });
     return response.data;
   },
+
+  // Report + trends in one request (backend computes both from a single scan)
+  getSummary: async (period: 'month' | 'quarter' | 'year' = 'month') => {
+    const response = await api.get(`/reports/summary?period=${period}`, {
+      timeout: 15000, // 15 seconds
+    });
+    return response.data;
+  },
 };
 
 export const adminAPI = {